@@ -6,7 +6,7 @@ from graph import graph
 # Define the schema for the database
 SCHEMA = """
 (:Pokemon)-[:HAS_TYPE]->(:Type)
-(:Pokemon)-[:LEARNS]->(:Attack)
+(:Pokemon)-[:LEARNS {method, level}]->(:Attack {name, language})
 (:Pokemon)-[:HAS_ABILITY]->(:Ability)
 (:Pokemon)-[:EVOLVES_TO]->(:Pokemon)
 (:Pokemon)-[:GERMAN_VERSION]->(:Pokemon)
@@ -1,252 +1,557 @@
 import os
+import csv
 import xml.etree.ElementTree as ET
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 from neo4j import GraphDatabase
 
 # Neo4j connection details
 # TODO: fill in your passwort
-uri = "bolt://localhost:7687"
-user = "neo4j"
-password = "yourPassword"
+# The environment variables allow to point the import at another database, e.g. a local test instance
+uri = os.environ.get('NEO4J_URI', "bolt://localhost:7687")
+user = os.environ.get('NEO4J_USERNAME', "neo4j")
+password = os.environ.get('NEO4J_PASSWORD', "yourPassword")
 
-# Initialize Neo4j driver
+# Initialize Neo4j driver, its connection pool is shared by the import workers
 driver = GraphDatabase.driver(uri, auth=(user, password))
 
+# Number of Pokémon sent to Neo4j in one UNWIND transaction
+BATCH_SIZE = 100
+
+# Elements of LearnableAttacks, imported as the method property of the LEARNS relationships
+LEARN_METHODS = ['LevelUp', 'TechnicalMachine']
+
+# Uniqueness constraints backing the MERGEs of create_pokemon: name, label and key properties.
+# English and German names can be equal, e.g. Pikachu, so the names are unique per language label.
+CONSTRAINTS = [
+    ('english_pokemon_name', 'EnglishVersion', ['name']),
+    ('german_pokemon_name', 'GermanVersion', ['name']),
+    ('type_name', 'Type', ['name']),
+    ('ability_key', 'Ability', ['name', 'hidden']),
+    ('attack_name', 'Attack', ['name', 'language']),
+]
+
+# Indexes without uniqueness, for lookups of a Pokemon by name in either language
+INDEXES = [
+    ('pokemon_name', 'Pokemon', ['name']),
+]
+
+# Labels and key properties of the nodes the parallel import locks before linking a batch, in lock order
+LOCK_ORDER = [
+    ('EnglishVersion', ['name']),
+    ('GermanVersion', ['name']),
+    ('Type', ['name']),
+    ('Ability', ['name', 'hidden']),
+    ('Attack', ['name', 'language']),
+]
+
+# Seconds to wait for new indexes to come online before importing
+INDEX_TIMEOUT = 300
+
+EXPORT_DIRECTORY = '../data/neo4j_import'
+
+# Properties of the Pokemon nodes in the order of the export columns, with the neo4j-admin type of the stats
+POKEMON_PROPERTIES = ['height', 'weight', 'gender_ratio', 'biology', 'introduction', 'trivia', 'category', 'shiny_variant',
+                      'hp:int', 'attack:int', 'defense:int', 'sp_atk:int', 'sp_def:int', 'speed:int']
+
+# Header of every exported csv file, the files are named after the keys.
+# The ids of Pokémon, abilities and attacks are only used to link the files and not stored as property.
+EXPORT_HEADERS = {
+    'pokemon': [':ID(Pokemon)', 'name', ':LABEL'] + POKEMON_PROPERTIES,
+    'types': ['name:ID(Type)', ':LABEL'],
+    'abilities': [':ID(Ability)', 'name', 'hidden:boolean', ':LABEL'],
+    'attacks': [':ID(Attack)', 'name', 'language', 'type', 'category', 'power', 'accuracy', 'pp', ':LABEL'],
+    'has_type': [':START_ID(Pokemon)', ':END_ID(Type)', ':TYPE'],
+    'learns': [':START_ID(Pokemon)', ':END_ID(Attack)', 'method', 'level', ':TYPE'],
+    'has_ability': [':START_ID(Pokemon)', ':END_ID(Ability)', ':TYPE'],
+    'evolves_to': [':START_ID(Pokemon)', ':END_ID(Pokemon)', ':TYPE'],
+    'german_version': [':START_ID(Pokemon)', ':END_ID(Pokemon)', ':TYPE'],
+}
+
+def parse_attacks(root, data_tag):
+    """
+    Extracts the attacks of one language with the method the Pokémon learns them by.
+    For TMs the Level holds the machine, e.g. TM01.
+    """
+    attacks = []
+    for method in LEARN_METHODS:
+        attacks_element = root.find(f'.//{data_tag}/Game/LearnableAttacks/{method}')
+        if attacks_element is None:
+            continue
+        for attack_element in attacks_element.findall('Attack'):
+            attacks.append({
+                'Method': method,
+                'Level': attack_element.find('Level').text.strip(),
+                'MoveName': attack_element.find('MoveName').text.strip(),
+                'Type': attack_element.find('Type').text.strip(),
+                'Category': attack_element.find('Category').text.strip(),
+                'Power': attack_element.find('Power').text.strip(),
+                'Accuracy': attack_element.find('Accuracy').text.strip(),
+                'PP': attack_element.find('PP').text.strip()
+            })
+    return attacks
+
+def parse_pokemon(root):
+    """
+    Extracts the properties of a Pokémon from its xml root as one row of the import query.
+    """
+    # Extract English name
+    name_element_en = root.find('.//Name/English')
+    if name_element_en is None:
+        raise ValueError("English name not found in XML.")
+    name_en = name_element_en.text.strip()
+
+    # Extract German name
+    name_element_de = root.find('.//Name/German')
+    if name_element_de is None:
+        raise ValueError("German name not found in XML.")
+    name_de = name_element_de.text.strip()
+
+    # Extract types for English
+    types_en = []
+    english_types_element = root.find('.//Types/EnglishType')
+    if english_types_element is not None:
+        types_elements_en = english_types_element.findall('Type')
+        types_en = [t.text.strip() for t in types_elements_en]
+
+    # Extract types for German
+    types_de = []
+    german_types_element = root.find('.//Types/GermanType')
+    if german_types_element is not None:
+        types_elements_de = german_types_element.findall('Type')
+        types_de = [t.text.strip() for t in types_elements_de]
+
+    # Extract abilities for both languages
+    ability_en = root.find('.//EnglishData/Game/Abilities/Ability/Name')
+    ability_en = ability_en.text.strip() if ability_en is not None else False
+    hidden_en = root.find('.//EnglishData/GameAbilities/Abiity/Hidden')
+    hidden_en = hidden_en.text.strip() == 'true' if hidden_en is not None else False
+
+    ability_de = root.find('.//GermanData/Game/Abilities/Ability/Name')
+    ability_de = ability_de.text.strip() if ability_de is not None else False
+    hidden_de = root.find('.//GermanData/Game/Abilities/Ability/Hidden')
+    hidden_de = hidden_de.text.strip() == 'true' if hidden_de is not None else False
+
+    # Extract stats
+    stats = {}
+    stats_elements = root.findall('.//Stats/*')
+    for stat in stats_elements:
+        stat_name = stat.tag
+        stat_value = int(stat.text.strip())
+        stats[stat_name] = stat_value
+
+    # Extract height, weight, gender ratio
+    height_element = root.find('.//Physique/Height')
+    height = height_element.text.strip() if height_element is not None else ''
+
+    weight_element = root.find('.//Physique/Weight')
+    weight = weight_element.text.strip() if weight_element is not None else ''
+
+    gender_ratio_element = root.find('.//GenderRatio')
+    gender_ratio = gender_ratio_element.text.strip() if gender_ratio_element is not None else ''
+
+    # Extract biology for both languages
+    biology_elements_en = root.findall('.//EnglishData/Biology/P')
+    biology_en = '\n'.join(p.text.strip() for p in biology_elements_en)
+
+    biology_elements_de = root.findall('.//GermanData/Biology/P')
+    biology_de = '\n'.join(p.text.strip() for p in biology_elements_de)
+
+    # Extract introduction for both languages
+    introduction_element_en = root.find('.//EnglishData/Introduction')
+    introduction_en = introduction_element_en.text.strip() if introduction_element_en is not None else ''
+
+    introduction_element_de = root.find('.//GermanData/Introduction')
+    introduction_de = introduction_element_de.text.strip() if introduction_element_de is not None else ''
+
+    # Extract trivia for both languages
+    trivia_elements_en = root.findall('.//EnglishData/Trivias/Trivia')
+    trivia_en = '\n'.join(p.text.strip() for p in trivia_elements_en)
+
+    trivia_elements_de = root.findall('.//GermanData/Trivias/Trivia')
+    trivia_de = '\n'.join(p.text.strip() for p in trivia_elements_de)
+
+    # Extract category
+    category_element_en = root.find('.//EnglishData/Category')
+    category_en = category_element_en.text.strip() if category_element_en is not None else ''
+
+    category_element_de = root.find('.//GermanData/Category')
+    category_de = category_element_de.text.strip() if category_element_de is not None else ''
+
+    # Extract shiny variant
+    shiny_variant_element = root.find('.//ShinyVariant')
+    shiny_variant = shiny_variant_element.text.strip() if shiny_variant_element is not None else ''
+
+    # Extract evolution line for English
+    evolution_line_en = []
+    evolution_line_element_en = root.find('.//EnglishData/EvolutionLine')
+    if evolution_line_element_en is not None:
+        evolution_names_en = evolution_line_element_en.findall('Name')
+        evolution_line_en = [name.text.strip() for name in evolution_names_en]
+
+    # Extract evolution line for German
+    evolution_line_de = []
+    evolution_line_element_de = root.find('.//GermanData/EvolutionLine')
+    if evolution_line_element_de is not None:
+        evolution_names_de = evolution_line_element_de.findall('Name')
+        evolution_line_de = [name.text.strip() for name in evolution_names_de]
+
+    # Extract attacks for both languages
+    attacks_en = parse_attacks(root, 'EnglishData')
+    attacks_de = parse_attacks(root, 'GermanData')
+
+    return dict(name_en=name_en, name_de=name_de, types_en=types_en, types_de=types_de, ability_en=ability_en, ability_de=ability_de, hidden_en=hidden_en, hidden_de=hidden_de,
+                height=height, weight=weight, gender_ratio=gender_ratio,
+                biology_en=biology_en, biology_de=biology_de, introduction_en=introduction_en, introduction_de=introduction_de, trivia_en=trivia_en, trivia_de=trivia_de, category_en=category_en, category_de=category_de, shiny_variant=shiny_variant, evolution_line_en=evolution_line_en, evolution_line_de=evolution_line_de,
+                attacks_en=attacks_en, attacks_de=attacks_de,
+                hp=stats.get('hp', 0), attack=stats.get('attack', 0), defense=stats.get('defense', 0),
+                sp_atk=stats.get('sp_atk', 0), sp_def=stats.get('sp_def', 0), speed=stats.get('speed', 0))
+
 def parse_and_import_xml(root):
     try:
-        # Extract English name
-        name_element_en = root.find('.//Name/English')
-        if name_element_en is None:
-            raise ValueError("English name not found in XML.")
-        name_en = name_element_en.text.strip()
-
-        # Extract German name
-        name_element_de = root.find('.//Name/German')
-        if name_element_de is None:
-            raise ValueError("German name not found in XML.")
-        name_de = name_element_de.text.strip()
-
-        # Extract types for English
-        types_en = []
-        english_types_element = root.find('.//Types/EnglishType')
-        if english_types_element is not None:
-            types_elements_en = english_types_element.findall('Type')
-            types_en = [t.text.strip() for t in types_elements_en]
-
-        # Extract types for German
-        types_de = []
-        german_types_element = root.find('.//Types/GermanType')
-        if german_types_element is not None:
-            types_elements_de = german_types_element.findall('Type')
-            types_de = [t.text.strip() for t in types_elements_de]
-
-        # Extract abilities for both languages
-        ability_en = root.find('.//EnglishData/Game/Abilities/Ability/Name')
-        ability_en = ability_en.text.strip() if ability_en is not None else False
-        hidden_en = root.find('.//EnglishData/GameAbilities/Abiity/Hidden')
-        hidden_en = hidden_en.text.strip() == 'true' if hidden_en is not None else False
-
-        ability_de = root.find('.//GermanData/Game/Abilities/Ability/Name')
-        ability_de = ability_de.text.strip() if ability_de is not None else False
-        hidden_de = root.find('.//GermanData/Game/Abilities/Ability/Hidden')
-        hidden_de = hidden_de.text.strip() == 'true' if hidden_de is not None else False
-
-        # Extract stats
-        stats = {}
-        stats_elements = root.findall('.//Stats/*')
-        for stat in stats_elements:
-            stat_name = stat.tag
-            stat_value = int(stat.text.strip())
-            stats[stat_name] = stat_value
-
-        # Extract height, weight, gender ratio
-        height_element = root.find('.//Physique/Height')
-        height = height_element.text.strip() if height_element is not None else ''
-
-        weight_element = root.find('.//Physique/Weight')
-        weight = weight_element.text.strip() if weight_element is not None else ''
-
-        gender_ratio_element = root.find('.//GenderRatio')
-        gender_ratio = gender_ratio_element.text.strip() if gender_ratio_element is not None else ''
-
-        # Extract biology for both languages
-        biology_elements_en = root.findall('.//EnglishData/Biology/P')
-        biology_en = '\n'.join(p.text.strip() for p in biology_elements_en)
-
-        biology_elements_de = root.findall('.//GermanData/Biology/P')
-        biology_de = '\n'.join(p.text.strip() for p in biology_elements_de)
-
-        # Extract introduction for both languages
-        introduction_element_en = root.find('.//EnglishData/Introduction')
-        introduction_en = introduction_element_en.text.strip() if introduction_element_en is not None else ''
-
-        introduction_element_de = root.find('.//GermanData/Introduction')
-        introduction_de = introduction_element_de.text.strip() if introduction_element_de is not None else ''
-
-        # Extract trivia for both languages
-        trivia_elements_en = root.findall('.//EnglishData/Trivias/Trivia')
-        trivia_en = '\n'.join(p.text.strip() for p in trivia_elements_en)
-
-        trivia_elements_de = root.findall('.//GermanData/Trivias/Trivia')
-        trivia_de = '\n'.join(p.text.strip() for p in trivia_elements_de)
-
-        # Extract category
-        category_element_en = root.find('.//EnglishData/Category')
-        category_en = category_element_en.text.strip() if category_element_en is not None else ''
-
-        category_element_de = root.find('.//GermanData/Category')
-        category_de = category_element_de.text.strip() if category_element_de is not None else ''
-
-        # Extract shiny variant
-        shiny_variant_element = root.find('.//ShinyVariant')
-        shiny_variant = shiny_variant_element.text.strip() if shiny_variant_element is not None else ''
-
-        # Extract evolution line for English
-        evolution_line_en = []
-        evolution_line_element_en = root.find('.//EnglishData/EvolutionLine')
-        if evolution_line_element_en is not None:
-            evolution_names_en = evolution_line_element_en.findall('Name')
-            evolution_line_en = [name.text.strip() for name in evolution_names_en]
-
-        # Extract evolution line for German
-        evolution_line_de = []
-        evolution_line_element_de = root.find('.//GermanData/EvolutionLine')
-        if evolution_line_element_de is not None:
-            evolution_names_de = evolution_line_element_de.findall('Name')
-            evolution_line_de = [name.text.strip() for name in evolution_names_de]
-
-        # Extract attacks for English
-        attacks_en = []
-        english_attacks_element = root.find('.//EnglishData/Game/LearnableAttacks/LevelUp')
-        if english_attacks_element is not None:
-            attack_elements_en = english_attacks_element.findall('Attack')
-            for attack_element in attack_elements_en:
-                level = attack_element.find('Level').text.strip()
-                move_name = attack_element.find('MoveName').text.strip()
-                move_type = attack_element.find('Type').text.strip()
-                category = attack_element.find('Category').text.strip()
-                power = attack_element.find('Power').text.strip()
-                accuracy = attack_element.find('Accuracy').text.strip()
-                pp = attack_element.find('PP').text.strip()
-                attacks_en.append({
-                    'Level': level,
-                    'MoveName': move_name,
-                    'Type': move_type,
-                    'Category': category,
-                    'Power': power,
-                    'Accuracy': accuracy,
-                    'PP': pp
-                })
-
-        # Extract attacks for German
-        attacks_de = []
-        german_attacks_element = root.find('.//GermanData/Game/LearnableAttacks/LevelUp')
-        if german_attacks_element is not None:
-            attack_elements_de = german_attacks_element.findall('Attack')
-            for attack_element in attack_elements_de:
-                level = attack_element.find('Level').text.strip()
-                move_name = attack_element.find('MoveName').text.strip()
-                move_type = attack_element.find('Type').text.strip()
-                category = attack_element.find('Category').text.strip()
-                power = attack_element.find('Power').text.strip()
-                accuracy = attack_element.find('Accuracy').text.strip()
-                pp = attack_element.find('PP').text.strip()
-                attacks_de.append({
-                    'Level': level,
-                    'MoveName': move_name,
-                    'Type': move_type,
-                    'Category': category,
-                    'Power': power,
-                    'Accuracy': accuracy,
-                    'PP': pp
-                })
-
+        row = parse_pokemon(root)
         with driver.session() as session:
-            session.write_transaction(create_pokemon, name_en, name_de, types_en, types_de, ability_en, ability_de, hidden_en, hidden_de, stats, height, weight, gender_ratio, biology_en, biology_de, introduction_en, introduction_de, trivia_en, trivia_de, category_en, category_de, shiny_variant, evolution_line_en, evolution_line_de, attacks_en, attacks_de)
+            session.execute_write(create_pokemon, [row])
     except Exception as e:
         print(f"Error parsing or importing XML: {e}")
 
-def create_pokemon(tx, name_en, name_de, types_en, types_de, ability_en, ability_de, hidden_en, hidden_de, stats, height, weight, gender_ratio, biology_en, biology_de, introduction_en, introduction_de, trivia_en, trivia_de, category_en, category_de, shiny_variant, evolution_line_en, evolution_line_de, attacks_en, attacks_de):
+def create_pokemon(tx, rows):
+    """
+    Creates the Pokémon of a batch of rows from parse_pokemon in one query.
+    The Pokémon properties are set on match as well, since a node may already exist as the evolution target of an earlier row.
+    """
     query = (
-        f"MERGE (p_en:Pokemon:EnglishVersion {{name: $name_en}}) "
-        f"ON CREATE SET p_en.height = $height, p_en.weight = $weight, p_en.gender_ratio = $gender_ratio, "
-        f"p_en.biology = $biology_en, p_en.introduction = $introduction_en, p_en.trivia = $trivia_en, p_en.category = $category_en, p_en.shiny_variant = $shiny_variant, "
-        f"p_en.hp = $hp, p_en.attack = $attack, p_en.defense = $defense, p_en.sp_atk = $sp_atk, p_en.sp_def = $sp_def, p_en.speed = $speed "
-        "WITH p_en "
-        "FOREACH (type_name_en IN $types_en | "
+        "UNWIND $rows AS row "
+        "MERGE (p_en:Pokemon:EnglishVersion {name: row.name_en}) "
+        "SET p_en.height = row.height, p_en.weight = row.weight, p_en.gender_ratio = row.gender_ratio, "
+        "p_en.biology = row.biology_en, p_en.introduction = row.introduction_en, p_en.trivia = row.trivia_en, p_en.category = row.category_en, p_en.shiny_variant = row.shiny_variant, "
+        "p_en.hp = row.hp, p_en.attack = row.attack, p_en.defense = row.defense, p_en.sp_atk = row.sp_atk, p_en.sp_def = row.sp_def, p_en.speed = row.speed "
+        "WITH row, p_en "
+        "FOREACH (type_name_en IN row.types_en | "
         "   MERGE (t_en:Type {name: type_name_en}) "
         "   MERGE (p_en)-[:HAS_TYPE]->(t_en) "
         ") "
-        "WITH p_en "
-        "FOREACH (attack_en IN $attacks_en | "
-        "   MERGE (a_en:Attack {name: attack_en.MoveName, level: attack_en.Level, type: attack_en.Type, category: attack_en.Category, power: attack_en.Power, accuracy: attack_en.Accuracy, pp: attack_en.PP}) "
-        "   MERGE (p_en)-[:LEARNS]->(a_en) "
+        "WITH row, p_en "
+        "FOREACH (attack_en IN row.attacks_en | "
+        "   MERGE (a_en:Attack {name: attack_en.MoveName, language: 'English'}) "
+        "   ON CREATE SET a_en.type = attack_en.Type, a_en.category = attack_en.Category, a_en.power = attack_en.Power, a_en.accuracy = attack_en.Accuracy, a_en.pp = attack_en.PP "
+        "   MERGE (p_en)-[:LEARNS {method: attack_en.Method, level: attack_en.Level}]->(a_en) "
         ") "
-        "WITH p_en "
-        f"MERGE (p_de:Pokemon:GermanVersion {{name: $name_de}}) "
-        f"ON CREATE SET p_de.height = $height, p_de.weight = $weight, p_de.gender_ratio = $gender_ratio, "
-        f"p_de.biology = $biology_de, p_de.introduction = $introduction_de, p_de.trivia = $trivia_de, p_de.category = $category_de, p_de.shiny_variant = $shiny_variant, "
-        f"p_de.hp = $hp, p_de.attack = $attack, p_de.defense = $defense, p_de.sp_atk = $sp_atk, p_de.sp_def = $sp_def, p_de.speed = $speed "
-        "WITH p_en, p_de "
-        "FOREACH (type_name_de IN $types_de | "
+        "WITH row, p_en "
+        "MERGE (p_de:Pokemon:GermanVersion {name: row.name_de}) "
+        "SET p_de.height = row.height, p_de.weight = row.weight, p_de.gender_ratio = row.gender_ratio, "
+        "p_de.biology = row.biology_de, p_de.introduction = row.introduction_de, p_de.trivia = row.trivia_de, p_de.category = row.category_de, p_de.shiny_variant = row.shiny_variant, "
+        "p_de.hp = row.hp, p_de.attack = row.attack, p_de.defense = row.defense, p_de.sp_atk = row.sp_atk, p_de.sp_def = row.sp_def, p_de.speed = row.speed "
+        "WITH row, p_en, p_de "
+        "FOREACH (type_name_de IN row.types_de | "
         "   MERGE (t_de:Type {name: type_name_de}) "
         "   MERGE (p_de)-[:HAS_TYPE]->(t_de) "
         ") "
-        "WITH p_en, p_de "
-        "FOREACH (attack_de IN $attacks_de | "
-        "   MERGE (a_de:Attack {name: attack_de.MoveName, level: attack_de.Level, type: attack_de.Type, category: attack_de.Category, power: attack_de.Power, accuracy: attack_de.Accuracy, pp: attack_de.PP}) "
-        "   MERGE (p_de)-[:LEARNS]->(a_de) "
+        "WITH row, p_en, p_de "
+        "FOREACH (attack_de IN row.attacks_de | "
+        "   MERGE (a_de:Attack {name: attack_de.MoveName, language: 'German'}) "
+        "   ON CREATE SET a_de.type = attack_de.Type, a_de.category = attack_de.Category, a_de.power = attack_de.Power, a_de.accuracy = attack_de.Accuracy, a_de.pp = attack_de.PP "
+        "   MERGE (p_de)-[:LEARNS {method: attack_de.Method, level: attack_de.Level}]->(a_de) "
         ") "
-        "WITH p_en, p_de "
-        "MERGE (a_en:Ability {name: $ability_en, hidden: $hidden_en}) "
+        "WITH row, p_en, p_de "
+        "MERGE (a_en:Ability {name: row.ability_en, hidden: row.hidden_en}) "
         "MERGE (p_en)-[:HAS_ABILITY]->(a_en) "
-        "WITH p_en, p_de "
-        "MERGE (a_de:Ability {name: $ability_de, hidden: $hidden_de}) "
+        "WITH row, p_en, p_de "
+        "MERGE (a_de:Ability {name: row.ability_de, hidden: row.hidden_de}) "
         "MERGE (p_de)-[:HAS_ABILITY]->(a_de) "
-        "WITH p_en, p_de "
-        "FOREACH (evolution_name_en IN $evolution_line_en | "
-        "   MERGE (e_en:Pokemon {name: evolution_name_en}) "
+        "WITH row, p_en, p_de "
+        "FOREACH (evolution_name_en IN row.evolution_line_en | "
+        "   MERGE (e_en:Pokemon:EnglishVersion {name: evolution_name_en}) "
         "   MERGE (p_en)-[:EVOLVES_TO]->(e_en) "
         ") "
-        "WITH p_en, p_de "
-        "FOREACH (evolution_name_de IN $evolution_line_de | "
-        "   MERGE (e_de:Pokemon {name: evolution_name_de}) "
+        "WITH row, p_en, p_de "
+        "FOREACH (evolution_name_de IN row.evolution_line_de | "
+        "   MERGE (e_de:Pokemon:GermanVersion {name: evolution_name_de}) "
         "   MERGE (p_de)-[:EVOLVES_TO]->(e_de) "
         ") "
         "MERGE (p_en)-[:GERMAN_VERSION]->(p_de)"
     )
-    tx.run(query, name_en=name_en, name_de=name_de, types_en=types_en, types_de=types_de, ability_en=ability_en, ability_de=ability_de, hidden_en=hidden_en, hidden_de=hidden_de,
-           height=height, weight=weight, gender_ratio=gender_ratio,
-           biology_en=biology_en, biology_de=biology_de, introduction_en=introduction_en, introduction_de=introduction_de, trivia_en=trivia_en, trivia_de=trivia_de, category_en=category_en, category_de=category_de, shiny_variant=shiny_variant, evolution_line_en=evolution_line_en, evolution_line_de=evolution_line_de,
-           attacks_en=attacks_en, attacks_de=attacks_de,
-           hp=stats.get('hp', 0), attack=stats.get('attack', 0), defense=stats.get('defense', 0),
-           sp_atk=stats.get('sp_atk', 0), sp_def=stats.get('sp_def', 0), speed=stats.get('speed', 0))
-
-def main(folder_path):
+    tx.run(query, rows=rows)
+
+def lock_keys(rows):
+    """
+    Returns the keys of the nodes a batch of rows links to per label of LOCK_ORDER, each list sorted.
+    """
+    keys = {label: set() for label, _ in LOCK_ORDER}
+    for row in rows:
+        keys['EnglishVersion'].update((name,) for name in [row['name_en']] + row['evolution_line_en'])
+        keys['GermanVersion'].update((name,) for name in [row['name_de']] + row['evolution_line_de'])
+        keys['Type'].update((type_name,) for type_name in row['types_en'] + row['types_de'])
+        keys['Ability'].update([(row['ability_en'], row['hidden_en']), (row['ability_de'], row['hidden_de'])])
+        keys['Attack'].update((attack['MoveName'], 'English') for attack in row['attacks_en'])
+        keys['Attack'].update((attack['MoveName'], 'German') for attack in row['attacks_de'])
+    # repr orders keys of mixed types, e.g. a missing ability stored as False
+    return {label: [list(key) for key in sorted(label_keys, key=repr)] for label, label_keys in keys.items()}
+
+def create_pokemon_locked(tx, rows):
+    """
+    Creates the Pokémon of a batch like create_pokemon, after locking every existing node the batch links to.
+    The nodes are locked label by label in LOCK_ORDER and sorted by key within a label, so all transactions take their locks
+    in the same global order and two batches sharing nodes wait for each other instead of deadlocking.
+    """
+    keys = lock_keys(rows)
+    for label, properties in LOCK_ORDER:
+        key_map = ', '.join(f'{name}: key[{i}]' for i, name in enumerate(properties))
+        # Writing a property takes the write lock of a node, removing it again leaves the node unchanged
+        tx.run(f"UNWIND $keys AS key MATCH (n:{label} {{{key_map}}}) SET n._lock = true REMOVE n._lock", keys=keys[label])
+    create_pokemon(tx, rows)
+
+def property_list(variable, properties):
+    return ', '.join(f'{variable}.{name}' for name in properties)
+
+def create_schema(session):
+    """
+    Creates the missing constraints and indexes and waits until they are online.
+    Every result is consumed inside its try, as the driver only raises an error of a statement when its result is read.
+    """
+    for name, label, properties in CONSTRAINTS:
+        try:
+            session.run(f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE ({property_list('n', properties)}) IS UNIQUE").consume()
+        except Exception as e:
+            # E.g. duplicates left by an import without constraints
+            print(f"Error creating constraint {name}: {e}")
+    for name, label, properties in INDEXES:
+        try:
+            session.run(f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON ({property_list('n', properties)})").consume()
+        except Exception as e:
+            print(f"Error creating index {name}: {e}")
+    try:
+        session.run("CALL db.awaitIndexes($timeout)", timeout=INDEX_TIMEOUT).consume()
+    except Exception as e:
+        # E.g. an index still populating after the timeout, ensure_schema reports its state
+        print(f"Error waiting for indexes: {e}")
+
+def schema_state(session):
+    """
+    Returns the state of every expected constraint and index, e.g. ONLINE, POPULATING, FAILED or MISSING.
+    A uniqueness constraint is reported with the state of the index backing it.
+    """
+    indexes = {record['name']: record for record in session.run("SHOW INDEXES YIELD name, state, owningConstraint")}
+    owned = {record['owningConstraint']: record for record in indexes.values() if record['owningConstraint']}
+    state = {}
+    for name, _, _ in CONSTRAINTS:
+        state[name] = owned[name]['state'] if name in owned else 'MISSING'
+    for name, _, _ in INDEXES:
+        state[name] = indexes[name]['state'] if name in indexes else 'MISSING'
+    return state
+
+def ensure_schema():
+    """
+    Creates the constraints and indexes the import relies on and reports their state.
+
+    :return: True if all of them are online
+    """
+    with driver.session() as session:
+        create_schema(session)
+        state = schema_state(session)
+    for name, name_state in state.items():
+        print(f"{name}: {name_state}")
+    not_online = [name for name, name_state in state.items() if name_state != 'ONLINE']
+    if not_online:
+        print(f"Constraints and indexes not online, the import will be slow: {not_online}")
+    return not not_online
+
+def import_batch(batch, create=create_pokemon):
+    """
+    Imports a batch of (file path, row) pairs in one transaction of the transaction function create.
+    If the transaction fails the rows are imported one by one, so only the failing files are skipped.
+    """
+    try:
+        with driver.session() as session:
+            session.execute_write(create, [row for _, row in batch])
+        print(f"Successfully imported {len(batch)} Pokémon")
+        return
+    except Exception as e:
+        if len(batch) == 1:
+            print(f"Error importing file {batch[0][0]}: {e}")
+            return
+        print(f"Error importing batch, retrying its files one by one: {e}")
+    for item in batch:
+        import_batch([item], create)
+
+def parse_file(file_path):
+    """
+    Parses an xml file and removes the namespace from its tags, so the paths of parse_pokemon match.
+    """
+    root = ET.parse(file_path).getroot()
+    for element in root.iter():
+        element.tag = element.tag.rsplit('}', 1)[-1]
+    return root
+
+def create_shared_nodes(tx, rows):
+    """
+    Creates the Type, Ability and Attack nodes of a batch of rows, which many Pokémon share,
+    and the Pokemon nodes of the rows and of their evolution lines, which rows of other batches link to.
+    """
+    query = (
+        "UNWIND $rows AS row "
+        "FOREACH (name IN [row.name_en] + row.evolution_line_en | MERGE (:Pokemon:EnglishVersion {name: name})) "
+        "FOREACH (name IN [row.name_de] + row.evolution_line_de | MERGE (:Pokemon:GermanVersion {name: name})) "
+        "FOREACH (type_name IN row.types_en + row.types_de | MERGE (:Type {name: type_name})) "
+        "MERGE (:Ability {name: row.ability_en, hidden: row.hidden_en}) "
+        "MERGE (:Ability {name: row.ability_de, hidden: row.hidden_de}) "
+        "FOREACH (attack_en IN row.attacks_en | "
+        "   MERGE (a_en:Attack {name: attack_en.MoveName, language: 'English'}) "
+        "   ON CREATE SET a_en.type = attack_en.Type, a_en.category = attack_en.Category, a_en.power = attack_en.Power, a_en.accuracy = attack_en.Accuracy, a_en.pp = attack_en.PP "
+        ") "
+        "FOREACH (attack_de IN row.attacks_de | "
+        "   MERGE (a_de:Attack {name: attack_de.MoveName, language: 'German'}) "
+        "   ON CREATE SET a_de.type = attack_de.Type, a_de.category = attack_de.Category, a_de.power = attack_de.Power, a_de.accuracy = attack_de.Accuracy, a_de.pp = attack_de.PP "
+        ")"
+    )
+    tx.run(query, rows=rows)
+
+def import_parallel(batches, workers):
+    """
+    Imports the batches with several worker threads.
+    A pre-pass creates the shared nodes and all Pokemon nodes first, so the workers only match them and do not race to create them.
+    The workers then lock the nodes of a batch in one global order before linking them, see create_pokemon_locked.
+    """
+    for batch in batches:
+        try:
+            with driver.session() as session:
+                session.execute_write(create_shared_nodes, [row for _, row in batch])
+        except Exception as e:
+            # The import query still creates the missing nodes itself
+            print(f"Error creating shared nodes: {e}")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(partial(import_batch, create=create_pokemon_locked), batches))
+
+def read_batches(folder_path, batch_size):
+    """
+    Yields the parsed rows of the xml files of a folder as lists of (file path, row) pairs.
+    """
+    batch = []
+    # Iterate over files in the directory
+    for filename in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, filename)
+
+        # Check if file_path is a file and ends with .xml
+        if os.path.isfile(file_path) and filename.endswith('.xml'):
+            try:
+                batch.append((file_path, parse_pokemon(parse_file(file_path))))
+            except Exception as e:
+                print(f"Error processing file {file_path}: {e}")
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def export_graph(rows):
+    """
+    Builds the nodes and relationships that create_pokemon would create for the rows, as rows of the export files.
+    The ids are derived from the names, e.g. 'English:Pikachu' or 'Static|false', so they are the same in every export.
+    Like the MERGEs of create_pokemon the first row creating a node sets its properties and duplicates are dropped.
+    """
+    graph = {name: {} for name in EXPORT_HEADERS}
+    for row in rows:
+        pokemon = {}
+        for language, suffix in [('English', 'en'), ('German', 'de')]:
+            pokemon_id = f'{language}:{row["name_" + suffix]}'
+            pokemon[language] = pokemon_id
+            properties = dict(row, biology=row['biology_' + suffix], introduction=row['introduction_' + suffix],
+                              trivia=row['trivia_' + suffix], category=row['category_' + suffix])
+            graph['pokemon'].setdefault(pokemon_id, [pokemon_id, row['name_' + suffix], f'Pokemon;{language}Version'] +
+                                        [properties[name.split(':')[0]] for name in POKEMON_PROPERTIES])
+
+            for type_name in row['types_' + suffix]:
+                graph['types'].setdefault(type_name, [type_name, 'Type'])
+                graph['has_type'].setdefault((pokemon_id, type_name), [pokemon_id, type_name, 'HAS_TYPE'])
+
+            for attack in row['attacks_' + suffix]:
+                attack_id = f'{language}:{attack["MoveName"]}'
+                graph['attacks'].setdefault(attack_id, [attack_id, attack['MoveName'], language, attack['Type'], attack['Category'],
+                                                        attack['Power'], attack['Accuracy'], attack['PP'], 'Attack'])
+                graph['learns'].setdefault((pokemon_id, attack_id, attack['Method'], attack['Level']),
+                                           [pokemon_id, attack_id, attack['Method'], attack['Level'], 'LEARNS'])
+
+            # parse_pokemon returns False if a Pokémon has no ability
+            if row['ability_' + suffix] is not False:
+                hidden = 'true' if row['hidden_' + suffix] else 'false'
+                ability_id = f'{row["ability_" + suffix]}|{hidden}'
+                graph['abilities'].setdefault(ability_id, [ability_id, row['ability_' + suffix], hidden, 'Ability'])
+                graph['has_ability'].setdefault((pokemon_id, ability_id), [pokemon_id, ability_id, 'HAS_ABILITY'])
+
+        graph['german_version'].setdefault((pokemon['English'], pokemon['German']),
+                                           [pokemon['English'], pokemon['German'], 'GERMAN_VERSION'])
+
+    # Evolutions point to the Pokémon of the same language, unknown names become nodes without properties
+    for row in rows:
+        for language, suffix in [('English', 'en'), ('German', 'de')]:
+            pokemon_id = f'{language}:{row["name_" + suffix]}'
+            for evolution_name in row['evolution_line_' + suffix]:
+                evolution_id = f'{language}:{evolution_name}'
+                graph['pokemon'].setdefault(evolution_id, [evolution_id, evolution_name, f'Pokemon;{language}Version'] + [''] * len(POKEMON_PROPERTIES))
+                graph['evolves_to'].setdefault((pokemon_id, evolution_id), [pokemon_id, evolution_id, 'EVOLVES_TO'])
+    return graph
+
+def export_csv(folder_path, target_directory=EXPORT_DIRECTORY):
+    """
+    Converts the xml files of a folder into node and relationship csv files for neo4j-admin database import.
+
+    :return: The neo4j-admin command importing the files
+    """
+    rows = [row for batch in read_batches(folder_path, BATCH_SIZE) for _, row in batch]
+    graph = export_graph(rows)
+    os.makedirs(target_directory, exist_ok=True)
+    for name, header in EXPORT_HEADERS.items():
+        with open(os.path.join(target_directory, name + '.csv'), 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(graph[name].values())
+        print(f"Exported {len(graph[name])} rows to {name}.csv")
+
+    node_files = ['pokemon', 'types', 'abilities', 'attacks']
+    arguments = [f'--nodes={os.path.join(target_directory, name)}.csv' for name in node_files]
+    arguments += [f'--relationships={os.path.join(target_directory, name)}.csv' for name in EXPORT_HEADERS if name not in node_files]
+    # Biology and trivia span several lines
+    command = 'neo4j-admin database import full --multiline-fields=true ' + ' '.join(arguments) + ' neo4j'
+    print(f"Import into a stopped, empty database with:\n{command}")
+    print("Running parseXML afterwards creates the constraints and indexes.")
+    return command
+
+def main(folder_path, batch_size=BATCH_SIZE, workers=1, export_directory=None):
+    """
+    Imports all xml files of a folder, batch_size Pokémon per transaction.
+    The constraints and indexes are created first.
+    With workers > 1 the batches are imported in parallel, see import_parallel.
+    With an export_directory nothing is imported, the files are converted into csv files for neo4j-admin instead.
+    """
     try:
         # Check if folder_path is a valid directory
         if not os.path.isdir(folder_path):
             raise ValueError(f"Folder path '{folder_path}' is not a valid directory.")
 
-        # Iterate over files in the directory
-        for filename in os.listdir(folder_path):
-            file_path = os.path.join(folder_path, filename)
-
-            # Check if file_path is a file and ends with .xml
-            if os.path.isfile(file_path) and filename.endswith('.xml'):
-                try:
-                    print(f"Processing file {filename}...")
-                    tree = ET.parse(file_path)
-                    root = tree.getroot()
-                    parse_and_import_xml(root)
-                    print(f"Successfully imported data from {file_path}")
-                except Exception as e:
-                    print(f"Error processing file {file_path}: {e}")
+        if export_directory:
+            export_csv(folder_path, export_directory)
+            return
+
+        ensure_schema()
+
+        if workers > 1:
+            import_parallel(list(read_batches(folder_path, batch_size)), workers)
+        else:
+            for batch in read_batches(folder_path, batch_size):
+                import_batch(batch)
     except Exception as e:
         print(f"Error in main function: {e}")
 
 if __name__ == "__main__":
-    folder_path = '../data/parsed_data'  # TODO: Replace with your folder path if necessary
-    main(folder_path)
-    driver.close()
+    import argparse
 
+    argument_parser = argparse.ArgumentParser(description='Import the parsed Pokémon xml files into Neo4j.')
+    argument_parser.add_argument('folder_path', nargs='?', default='../data/parsed_data')  # TODO: Replace with your folder path if necessary
+    argument_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Pokémon per transaction')
+    argument_parser.add_argument('--workers', type=int, default=1, help='number of parallel import threads')
+    argument_parser.add_argument('--export', nargs='?', const=EXPORT_DIRECTORY,
+                                 help='write csv files for neo4j-admin database import instead of importing')
+    args = argument_parser.parse_args()
 
+    main(args.folder_path, args.batch_size, args.workers, args.export)
+    driver.close()
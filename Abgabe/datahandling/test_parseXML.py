@@ -0,0 +1,77 @@
+import os
+import pytest
+
+# The test deletes the whole database, so it only runs against an instance given explicitly, e.g. a local Neo4j container
+if 'NEO4J_TEST_URI' not in os.environ:
+    pytest.skip("NEO4J_TEST_URI of a disposable Neo4j instance not set", allow_module_level=True)
+os.environ['NEO4J_URI'] = os.environ['NEO4J_TEST_URI']
+os.environ['NEO4J_USERNAME'] = os.environ.get('NEO4J_TEST_USERNAME', 'neo4j')
+os.environ['NEO4J_PASSWORD'] = os.environ.get('NEO4J_TEST_PASSWORD', 'neo4j')
+
+import parseXML
+
+POKEMON_COUNT = 60
+BATCH_SIZE = 5
+WORKERS = 8
+
+
+def make_row(number):
+    """
+    Returns an import row of a synthetic Pokémon. The rows share few types, abilities and attacks and evolve into
+    Pokémon of other batches, so parallel batches keep linking to the same nodes.
+    """
+    def attacks(language):
+        return [{'Method': 'LevelUp', 'Level': str(level), 'MoveName': f'{language} Move {(number + level) % 7}',
+                 'Type': 'Normal', 'Category': 'Physical', 'Power': '40', 'Accuracy': '100', 'PP': '35'}
+                for level in range(1, 6)]
+    evolutions = [(number + 17) % POKEMON_COUNT, (number + 31) % POKEMON_COUNT]
+    return dict(name_en=f'Mon {number}', name_de=f'Monster {number}',
+                types_en=[f'Type {number % 3}', f'Type {(number + 1) % 3}'], types_de=[f'Typ {number % 3}'],
+                ability_en=f'Ability {number % 4}', ability_de=f'Fähigkeit {number % 4}', hidden_en=False, hidden_de=False,
+                height='1.0 m', weight='10.0 kg', gender_ratio='50% male, 50% female',
+                biology_en='', biology_de='', introduction_en='', introduction_de='', trivia_en='', trivia_de='',
+                category_en='', category_de='', shiny_variant='',
+                evolution_line_en=[f'Mon {evolution}' for evolution in evolutions],
+                evolution_line_de=[f'Monster {evolution}' for evolution in evolutions],
+                attacks_en=attacks('English'), attacks_de=attacks('German'),
+                hp=45, attack=49, defense=49, sp_atk=65, sp_def=65, speed=45)
+
+
+def graph_counts():
+    """
+    Returns the number of nodes per label set and of relationships per type, and the nodes left with a lock property.
+    """
+    with parseXML.driver.session() as session:
+        nodes = {tuple(sorted(record['labels'])): record['count']
+                 for record in session.run("MATCH (n) RETURN labels(n) AS labels, count(n) AS count")}
+        relationships = {record['type']: record['count']
+                         for record in session.run("MATCH ()-[r]->() RETURN type(r) AS type, count(r) AS count")}
+        locked = session.run("MATCH (n) WHERE n._lock IS NOT NULL RETURN count(n) AS count").single()['count']
+    return nodes, relationships, locked
+
+
+def clear_graph():
+    with parseXML.driver.session() as session:
+        session.run("MATCH (n) DETACH DELETE n").consume()
+
+
+def test_parallel_import_matches_serial_import():
+    """
+    Importing the same rows with several workers yields the same nodes and relationships as one worker.
+    """
+    rows = [(f'{number:04d}.xml', make_row(number)) for number in range(POKEMON_COUNT)]
+    batches = [rows[start:start + BATCH_SIZE] for start in range(0, len(rows), BATCH_SIZE)]
+    clear_graph()
+    parseXML.ensure_schema()
+    try:
+        for batch in batches:
+            parseXML.import_batch(batch)
+        serial = graph_counts()
+        clear_graph()
+        parseXML.import_parallel(batches, WORKERS)
+        parallel = graph_counts()
+    finally:
+        clear_graph()
+    assert serial[0][('EnglishVersion', 'Pokemon')] == POKEMON_COUNT
+    assert parallel == serial
+    assert parallel[2] == 0
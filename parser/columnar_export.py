@@ -0,0 +1,192 @@
+import os
+import re
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.feather as feather
+from pokemon_corpus import CORPUS_PATH, PokemonCorpus
+
+COLUMNAR_DIRECTORY = '../data/columnar'
+
+FORMATS = ['parquet', 'arrow']
+
+LANGUAGES = {'english': 'EnglishData', 'german': 'GermanData'}
+
+# Stat column -> key in the English and in the German stats dict
+STAT_COLUMNS = {
+    'hp': ('HP', 'KP'),
+    'attack': ('Attack', 'Angriff'),
+    'defense': ('Defense', 'Verteidigung'),
+    'sp_atk': ('Sp.Atk', 'SpezialAngriff'),
+    'sp_def': ('Sp.Def', 'SpezialVerteidigung'),
+    'speed': ('Speed', 'Initiative'),
+}
+
+SCHEMAS = {
+    'pokemon': pa.schema([
+        ('pokemon_id', pa.int32()),
+        ('english_name', pa.string()),
+        ('german_name', pa.string()),
+        ('english_category', pa.string()),
+        ('german_category', pa.string()),
+        ('gender_ratio', pa.string()),
+        ('height_m', pa.float64()),
+        ('weight_kg', pa.float64()),
+        *[(column, pa.int16()) for column in STAT_COLUMNS],
+        ('base_stat_total', pa.int16()),
+    ]),
+    'types': pa.schema([
+        ('pokemon_id', pa.int32()),
+        ('language', pa.string()),
+        ('slot', pa.int8()),
+        ('type', pa.string()),
+    ]),
+    'abilities': pa.schema([
+        ('pokemon_id', pa.int32()),
+        ('language', pa.string()),
+        ('ability', pa.string()),
+        ('hidden', pa.bool_()),
+    ]),
+    'learnsets': pa.schema([
+        ('pokemon_id', pa.int32()),
+        ('language', pa.string()),
+        ('method', pa.string()),
+        ('level', pa.int16()),
+        ('machine', pa.string()),
+        ('move', pa.string()),
+        ('type', pa.string()),
+        ('category', pa.string()),
+        ('power', pa.int16()),
+        # The English parser writes 101 for moves that never miss
+        ('accuracy', pa.int16()),
+        ('pp', pa.int16()),
+    ]),
+}
+
+
+def parse_int(value):
+    """
+    Returns the leading integer of a parsed value like ' 45', '100%' or 40, or None for values like '—'.
+    """
+    if isinstance(value, int):
+        return value
+    match = re.match(r'-?\d+', str(value).strip())
+    return int(match.group()) if match else None
+
+
+def parse_measure(value):
+    """
+    Returns the number of a height or weight like '0.7 m' or '6,9 kg' as float.
+    """
+    match = re.search(r'\d+(?:[.,]\d+)?', str(value))
+    return float(match.group().replace(',', '.')) if match else None
+
+
+def first_value(*values):
+    return next((value for value in values if value is not None), None)
+
+
+def pokemon_rows(record):
+    """
+    Flattens one corpus record into the rows of the tables in SCHEMAS.
+    Stats and physique are taken from the English data, falling back to the German data.
+    """
+    pokemon_id = record['ID']
+    english_game = record['EnglishData']['Game']
+    german_game = record['GermanData']['Game']
+    gender_ratio = english_game['GenderRatio']
+
+    pokemon = {
+        'pokemon_id': pokemon_id,
+        'english_name': record['Name']['English'],
+        'german_name': record['Name']['German'],
+        'english_category': record['EnglishData']['Category'],
+        'german_category': record['GermanData']['Category'],
+        'gender_ratio': '; '.join(gender_ratio) if isinstance(gender_ratio, list) else gender_ratio,
+        'height_m': first_value(parse_measure(english_game['Physique']['Height']),
+                                parse_measure(german_game['Physique']['Height'])),
+        'weight_kg': first_value(parse_measure(english_game['Physique']['Weight']),
+                                 parse_measure(german_game['Physique']['Weight'])),
+    }
+    for column, (english_key, german_key) in STAT_COLUMNS.items():
+        pokemon[column] = first_value(parse_int(english_game['Stats'].get(english_key, '')),
+                                      parse_int(german_game['Stats'].get(german_key, '')))
+    stats = [pokemon[column] for column in STAT_COLUMNS]
+    pokemon['base_stat_total'] = sum(stats) if None not in stats else None
+
+    rows = {'pokemon': [pokemon], 'types': [], 'abilities': [], 'learnsets': []}
+    for language, types_key in [('english', 'EnglishType'), ('german', 'GermanType')]:
+        for slot, type_name in enumerate(record['Types'][types_key]['Type'], 1):
+            rows['types'].append({'pokemon_id': pokemon_id, 'language': language, 'slot': slot, 'type': type_name})
+
+    for language, data_key in LANGUAGES.items():
+        game = record[data_key]['Game']
+        for ability in game['Abilities']['Ability']:
+            rows['abilities'].append({'pokemon_id': pokemon_id, 'language': language,
+                                      'ability': ability['Name'], 'hidden': ability['Hidden']})
+        for method, moves in game['LearnableAttacks'].items():
+            for move in moves['Attack']:
+                # For TMs the level column of the parsers holds the machine, e.g. 'TM01'
+                machine = str(move['Level']) if method == 'TechnicalMachine' else None
+                rows['learnsets'].append({
+                    'pokemon_id': pokemon_id,
+                    'language': language,
+                    'method': method,
+                    'level': None if machine else parse_int(move['Level']),
+                    'machine': machine,
+                    'move': move['MoveName'],
+                    'type': move['Type'],
+                    'category': move['Category'],
+                    'power': parse_int(move['Power']),
+                    'accuracy': parse_int(move['Accuracy']),
+                    'pp': parse_int(move['PP']),
+                })
+    return rows
+
+
+def build_tables(records):
+    """
+    Builds the typed Arrow tables of SCHEMAS from corpus records.
+    """
+    rows = {name: [] for name in SCHEMAS}
+    for record in records:
+        for name, table_rows in pokemon_rows(record).items():
+            rows[name].extend(table_rows)
+    return {name: pa.Table.from_pylist(rows[name], schema=schema) for name, schema in SCHEMAS.items()}
+
+
+def write_tables(tables, target_directory, file_format='parquet'):
+    """
+    Writes every table as '<table>.parquet' or as Arrow IPC file '<table>.arrow' and returns the paths.
+    """
+    os.makedirs(target_directory, exist_ok=True)
+    paths = []
+    for name, table in tables.items():
+        path = os.path.join(target_directory, f'{name}.{file_format}')
+        if file_format == 'parquet':
+            pq.write_table(table, path)
+        else:
+            feather.write_feather(table, path)
+        paths.append(path)
+    return paths
+
+
+def main(corpus_path=CORPUS_PATH, target_directory=COLUMNAR_DIRECTORY, file_format='parquet'):
+    """
+    Exports the Pokémon corpus of poke_xml_creator --corpus as columnar tables.
+    """
+    tables = build_tables(PokemonCorpus(corpus_path))
+    for path in write_tables(tables, target_directory, file_format):
+        print(f"Wrote {path}")
+    return tables
+
+
+if __name__ == "__main__":
+    import argparse
+
+    argument_parser = argparse.ArgumentParser(description='Export the Pokémon corpus as Parquet or Arrow tables.')
+    argument_parser.add_argument('--corpus', default=CORPUS_PATH)
+    argument_parser.add_argument('--target', default=COLUMNAR_DIRECTORY)
+    argument_parser.add_argument('--format', choices=FORMATS, default='parquet')
+    args = argument_parser.parse_args()
+
+    main(args.corpus, args.target, args.format)
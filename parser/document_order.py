@@ -0,0 +1,38 @@
+from bisect import bisect_left
+from html_backend import cached_on_soup
+
+
+class DocumentOrder:
+    """
+    Positions of all tags of a soup in document order, i.e. the order find_next() visits them.
+    """
+    def __init__(self, soup):
+        self.tags = soup.find_all(True)
+        self.positions = {id(tag): position for position, tag in enumerate(self.tags)}
+        self.p_positions = [position for position, tag in enumerate(self.tags) if tag.name == 'p']
+
+    def position(self, tag):
+        return self.positions[id(tag)]
+
+    def p_tags_between(self, start_tag, end_tag):
+        """
+        Returns the <p> tags from start_tag (inclusive) up to end_tag (exclusive).
+        If end_tag does not come after start_tag the range runs to the end of the document.
+        """
+        start = self.position(start_tag)
+        end = self.positions.get(id(end_tag), len(self.tags))
+        if end <= start:
+            end = len(self.tags)
+        first = bisect_left(self.p_positions, start)
+        last = bisect_left(self.p_positions, end)
+        return [self.tags[position] for position in self.p_positions[first:last]]
+
+
+def document_order(tag):
+    """
+    Returns the DocumentOrder of the document a tag belongs to, building it on first use.
+    """
+    root = tag
+    while root.parent is not None:
+        root = root.parent
+    return cached_on_soup(root, '_document_order', DocumentOrder)
@@ -1,6 +1,7 @@
 import requests
 import re
-from bs4 import BeautifulSoup
+from document_order import document_order
+from html_backend import DEFAULT_BACKEND, cached_on_soup, make_soup
 import xml.etree.ElementTree as ET
 
 
@@ -10,6 +11,55 @@ def fetch_pokemon_data(pokemon_name):
     response.raise_for_status()
     return response.text
 
+class SectionIndex:
+    """
+    Anchors of a Bulbapedia page mapped to their tags, built in a single pass over the document.
+    Lists keep document order, so the first entry is what soup.find would have returned.
+    """
+    def __init__(self, soup):
+        self.ids = {}
+        self.link_titles = {}
+        self.link_hrefs = {}
+        self.header_styles = {}
+        for tag in soup.find_all(True):
+            tag_id = tag.get('id')
+            if tag_id is not None and tag_id not in self.ids:
+                self.ids[tag_id] = tag
+            if tag.name == 'a':
+                if tag.get('title') is not None:
+                    self.link_titles.setdefault(tag['title'], []).append(tag)
+                if tag.get('href') is not None:
+                    self.link_hrefs.setdefault(tag['href'], []).append(tag)
+            elif tag.name == 'th' and tag.get('style') is not None:
+                self.header_styles.setdefault(tag['style'], []).append(tag)
+
+    def by_id(self, tag_id, name=None):
+        tag = self.ids.get(tag_id)
+        if tag is None or (name is not None and tag.name != name):
+            return None
+        return tag
+
+    def links_by_title(self, title):
+        return self.link_titles.get(title, [])
+
+    def link_by_title(self, title):
+        links = self.links_by_title(title)
+        return links[0] if links else None
+
+    def link_by_href(self, href):
+        links = self.link_hrefs.get(href, [])
+        return links[0] if links else None
+
+    def headers_by_style(self, style):
+        return self.header_styles.get(style, [])
+
+
+def section_index(soup):
+    """
+    Returns the SectionIndex of a soup, building it on first use.
+    """
+    return cached_on_soup(soup, '_section_index', SectionIndex)
+
 def extract_p_text_between_tags(start_tag, end_tag, listlike=False):
     """
     Extracts text from <p> tags between start_tag and end_tag.
@@ -17,13 +67,8 @@ def extract_p_text_between_tags(start_tag, end_tag, listlike=False):
     if not start_tag or not end_tag:
         return "One or both tags not found."
 
-    current_tag = start_tag
-    p_texts = []
-
-    while current_tag and current_tag != end_tag:
-        if current_tag.name == 'p':
-            p_texts.append(current_tag.get_text())
-        current_tag = current_tag.find_next()
+    # One linear scan over the precomputed document order instead of walking with find_next()
+    p_texts = [p_tag.get_text() for p_tag in document_order(start_tag).p_tags_between(start_tag, end_tag)]
 
     if listlike:
         clean_list = [re.sub(r'[\d+]', '', element.strip().replace('\u2060', ''))
@@ -37,30 +82,30 @@ def extract_p_text_between_tags(start_tag, end_tag, listlike=False):
     return cleaned_biology
 
 def get_name(soup):
-    return soup.find('h1', {'id': 'firstHeading'}).text.strip()[:-10]
+    return section_index(soup).by_id('firstHeading', 'h1').text.strip()[:-10]
 
 
 def get_dex_number(soup):
-    return soup.find_all('a', {'title': 'List of Pokémon by National Pokédex number'})[1].text.strip()[1:]
+    return section_index(soup).links_by_title('List of Pokémon by National Pokédex number')[1].text.strip()[1:]
 
 def get_category(soup):
-    return soup.find('a', {'title': 'Pokémon category'}).text.strip()
+    return section_index(soup).link_by_title('Pokémon category').text.strip()
 
 def get_type(soup):
-    type_section = soup.find('a', {'title': 'Type'}).parent
+    type_section = section_index(soup).link_by_title('Type').parent
     # Only get the first two types as the other types are for different forms
     type_list = type_section.find_next_sibling('table').find_all('b')[0:2]
     pokemon_type = [type.text.strip() for type in type_list if 'Unknown' != type.text.strip()]
     return pokemon_type
 
 def get_introduction(soup):
-    intro_first_tag = soup.find('a', {'title': 'List of Pokémon by base friendship'})
-    intro_end_tag = soup.find('a', {'href': '#Biology'})
+    intro_first_tag = section_index(soup).link_by_title('List of Pokémon by base friendship')
+    intro_end_tag = section_index(soup).link_by_href('#Biology')
     introduction = extract_p_text_between_tags(intro_first_tag, intro_end_tag)
     return introduction
 
 def get_ability(soup, name):
-    abilities_section = soup.find('a', {'title': 'Ability'}).parent
+    abilities_section = section_index(soup).link_by_title('Ability').parent
     abilities_list_parent = abilities_section.find_next_sibling('table').find_all('td')
     # The found section is more encapsuled as usual so we call parent ones more.
     if abilities_list_parent is None:
@@ -126,8 +171,8 @@ def get_ability(soup, name):
     return abilities
 
 def get_stats(soup):
-    stats_section = soup.findAll('th', {
-        'style': 'padding-left: 0.2em; padding-right: 0.2em; display: flex; justify-content: space-between;'})
+    stats_section = list(section_index(soup).headers_by_style(
+        'padding-left: 0.2em; padding-right: 0.2em; display: flex; justify-content: space-between;'))
     # Only keep the stats of the newest Version
     while len(stats_section) > 6:
         stats_section.pop(0)
@@ -140,19 +185,19 @@ def get_stats(soup):
 
 def get_egg_data(soup):
     eggs = {}
-    egg_section = soup.find('a', {'href': '/wiki/Egg_Group'}).parent
+    egg_section = section_index(soup).link_by_href('/wiki/Egg_Group').parent
 
     egg_list = egg_section.find_next_sibling('table').find_all('a')
     egg_group = [egg.text.strip() for egg in egg_list if egg.text.strip() not in ['Cap', 'Cosplay']]
     eggs["EggGroup"] = egg_group
 
-    hatch_section = soup.find('a', {'href': '/wiki/Egg_cycle'}).parent.parent
+    hatch_section = section_index(soup).link_by_href('/wiki/Egg_cycle').parent.parent
     hatch = hatch_section.find('td').text.strip().replace('\xa0', ' ').replace('\n', ' ')
     eggs["HatchTime"] = [hatch]
     return eggs
 
 def get_gender(soup):
-    gender_section = soup.find('a', {'title': 'List of Pokémon by gender ratio'}).parent
+    gender_section = section_index(soup).link_by_title('List of Pokémon by gender ratio').parent
     gender_list = gender_section.find_next_sibling('table').find_all('td')
     gender = []
     for entry in gender_list:
@@ -161,19 +206,19 @@ def get_gender(soup):
     return gender
 
 def get_physique(soup):
-    height_section = soup.find('a', {'title': 'List of Pokémon by height'}).parent
+    height_section = section_index(soup).link_by_title('List of Pokémon by height').parent
     # first element is in m and not feet
     height = height_section.find_next_sibling('table').find_all('td')[1].text.strip()
 
     # Weight
-    weight_section = soup.find('a', {'title': 'Weight'}).parent
+    weight_section = section_index(soup).link_by_title('Weight').parent
     # first element is in lbs and not kg
     weight = weight_section.find_next_sibling('table').find_all('td')[1].text.strip()
     physique = [height, weight]
     return physique
 
 def get_biology(soup):
-    biology_section = soup.find(id='Biology')
+    biology_section = section_index(soup).by_id('Biology')
     biology = []
     if biology_section:
         current_elem = biology_section.find_next()
@@ -185,7 +230,7 @@ def get_biology(soup):
     return biology
 
 def get_evolution(soup, name):
-    evolution_section = soup.find('span', id='Evolution')
+    evolution_section = section_index(soup).by_id('Evolution', 'span')
     evolution_line = []
     if evolution_section:
         evolution_parent = evolution_section.parent
@@ -210,7 +255,7 @@ def get_evolution(soup, name):
 
 def get_form(soup, name):
     forms = []
-    form_section = soup.find('a', title='Pokémon category').parent.find_next('table')
+    form_section = section_index(soup).link_by_title('Pokémon category').parent.find_next('table')
     if form_section:
         for row in form_section.find_all('small'):
             # Replace empty space declaration of html file
@@ -229,7 +274,7 @@ def get_form(soup, name):
     return forms
 
 def get_pokedex_entries(soup):
-    pokedex_entries_section = soup.find('span', {'id': 'Pok.C3.A9dex_entries'}).parent
+    pokedex_entries_section = section_index(soup).by_id('Pok.C3.A9dex_entries', 'span').parent
     pokedex_table = pokedex_entries_section.find_next('table')
 
     # Extract the Pokédex entries
@@ -243,7 +288,7 @@ def get_pokedex_entries(soup):
     return pokedex_entries
 
 def get_major_appearances(soup):
-    major_appearances_header = soup.find(id="Major_appearances")
+    major_appearances_header = section_index(soup).by_id('Major_appearances')
 
     # Collect the paragraphs under the "Major appearances" section
     major_appearances_title = []
@@ -272,7 +317,7 @@ def get_major_appearances(soup):
 
 
 def get_learnset(soup):
-    level_up_moves_section = soup.find('span', {'id': 'By_leveling_up'}).parent
+    level_up_moves_section = section_index(soup).by_id('By_leveling_up', 'span').parent
     level_up_moves_table = level_up_moves_section.find_next('table')
 
     # Extract the moves learned by level up
@@ -308,7 +353,7 @@ def get_learnset(soup):
             level_up_moves.append((int(level), move_name, move_type, move_category, int(power), accuracy, int(pp)))
 
     # TM moves
-    tm_moves_section = soup.find('span', {'id': 'By_TM'})
+    tm_moves_section = section_index(soup).by_id('By_TM', 'span')
     tm_moves = []
     if tm_moves_section:
         tm_moves_parent = tm_moves_section.parent
@@ -345,7 +390,7 @@ def get_learnset(soup):
 
 
 def get_trivia(soup):
-    trivias_section = soup.find('span', {'id': 'Trivia'}).parent
+    trivias_section = section_index(soup).by_id('Trivia', 'span').parent
     trivias_list = trivias_section.find_next('ul')
 
     # Extract the trivias items
@@ -354,9 +399,9 @@ def get_trivia(soup):
         trivias.append(item.text.strip().replace('\n', ''))
     return trivias
 
-def main(bulbapedia_html):
-    # Create Soup out of html
-    bulbapedia_soup = BeautifulSoup(bulbapedia_html, 'html.parser')
+def main(bulbapedia_html, backend=DEFAULT_BACKEND):
+    # Create Soup out of html with the selected tree builder
+    bulbapedia_soup = make_soup(bulbapedia_html, backend)
     name = get_name(bulbapedia_soup)
 
     data = {
@@ -0,0 +1,95 @@
+import time
+import functools
+from contextlib import contextmanager
+
+# Record of the page currently being profiled: extractor -> [calls, seconds, failures]
+_current_page = None
+_instrumented_modules = set()
+
+
+def is_extractor(name):
+    return name.startswith('get_') or name == 'extract_p_text_between_tags'
+
+
+def _wrap(label, function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if _current_page is None:
+            return function(*args, **kwargs)
+        record = _current_page.setdefault(label, [0, 0.0, 0])
+        record[0] += 1
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception:
+            record[2] += 1
+            raise
+        finally:
+            record[1] += time.perf_counter() - start
+    return wrapper
+
+
+def instrument(modules):
+    """
+    Wraps every get_* extractor and extract_p_text_between_tags of the modules.
+    The parsers look the functions up in their module globals, so their main functions pick up the wrappers.
+    Outside of profile_page the wrappers only add a single check.
+    """
+    for module in modules:
+        if module.__name__ in _instrumented_modules:
+            continue
+        prefix = module.__name__.rsplit('.', 1)[-1]
+        for name, function in list(vars(module).items()):
+            if callable(function) and is_extractor(name):
+                setattr(module, name, _wrap(f'{prefix}.{name}', function))
+        _instrumented_modules.add(module.__name__)
+
+
+@contextmanager
+def profile_page():
+    """
+    Records the extractor calls made inside the block and yields the record.
+    Time of nested extractors, e.g. extract_p_text_between_tags in get_introduction, is counted for both.
+    """
+    global _current_page
+    _current_page = {}
+    try:
+        yield _current_page
+    finally:
+        _current_page = None
+
+
+class ProfileReport:
+    """
+    Aggregates the page records of a run, also across worker processes.
+    """
+    def __init__(self):
+        self.pages = {}
+
+    def add_page(self, page_key, record):
+        if record is not None:
+            self.pages[page_key] = record
+
+    def totals(self):
+        totals = {}
+        for page_key, record in self.pages.items():
+            for label, (calls, seconds, failures) in record.items():
+                total = totals.setdefault(label, {'pages': 0, 'calls': 0, 'seconds': 0.0, 'failures': 0, 'slowest': (0.0, None)})
+                total['pages'] += 1
+                total['calls'] += calls
+                total['seconds'] += seconds
+                total['failures'] += failures
+                if seconds >= total['slowest'][0]:
+                    total['slowest'] = (seconds, page_key)
+        return totals
+
+    def print_report(self):
+        totals = self.totals()
+        print(f"\nExtractor profile of {len(self.pages)} Pokémon")
+        print(f"{'extractor':<50}{'calls':>8}{'total s':>10}{'mean ms':>10}{'failures':>10}  slowest page")
+        for label, total in sorted(totals.items(), key=lambda item: -item[1]['seconds']):
+            slowest_seconds, slowest_page = total['slowest']
+            print(f"{label:<50}{total['calls']:>8}{total['seconds']:>10.2f}"
+                  f"{1000 * total['seconds'] / total['calls']:>10.2f}{total['failures']:>10}"
+                  f"  {slowest_page} ({1000 * slowest_seconds:.1f} ms)")
+
@@ -1,15 +1,101 @@
 import re
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
+from document_order import document_order
+from html_backend import DEFAULT_BACKEND, cached_on_soup, make_soup
+
+
+class BisafansStrainer(SoupStrainer):
+    """
+    Only builds the parts of a Bisafans page the extractors read: the dl-horizontal tables,
+    the evoRow and sonder divs, all h3/h4 headings and the element directly following each heading.
+
+    Beautiful Soup only asks the strainer about tags outside of already kept subtrees, so the first
+    tag it is asked about after a heading is the one find_next() returns in the full tree.
+    """
+    def __init__(self):
+        super().__init__()
+        self.keep_next = False
+
+    def _keep(self, name, attrs):
+        # A heading directly following a heading, e.g. h4 'Serie' after h3 'Anime', needs its own next element
+        kept_as_next = self.keep_next
+        self.keep_next = name in ('h3', 'h4')
+        if kept_as_next or self.keep_next:
+            return True
+        attrs = attrs or {}
+        if name == 'dl':
+            classes = attrs.get('class') or []
+            if isinstance(classes, str):
+                classes = classes.split()
+            return 'dl-horizontal' in classes
+        return name == 'div' and attrs.get('id') in ('evoRow', 'sonder')
+
+    # Beautiful Soup >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return self._keep(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    # Beautiful Soup < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        return self._keep(markup_name, dict(markup_attrs))
+
+class BisafansIndex:
+    """
+    Lookups of a Bisafans page, built in one pass so the extractors do not rescan the whole document:
+    the dl-horizontal tables (label -> value tag), the h3/h4 headings by text and the divs by id.
+    """
+    def __init__(self, soup):
+        self.tables = []
+        self.headings = {'h3': [], 'h4': []}
+        self.heading_texts = {}
+        self.stripped_heading_texts = {}
+        self.div_ids = {}
+        for tag in soup.find_all(['dl', 'h3', 'h4', 'div']):
+            if tag.name == 'dl':
+                if 'dl-horizontal' not in (tag.get('class') or []):
+                    continue
+                entries = {}
+                for entry in tag.find_all('dt'):
+                    entries.setdefault(entry.text, entry.find_next())
+                self.tables.append(entries)
+            elif tag.name == 'div':
+                if tag.get('id') is not None:
+                    self.div_ids.setdefault(tag['id'], tag)
+            else:
+                self.headings[tag.name].append(tag)
+                self.heading_texts.setdefault((tag.name, tag.text), []).append(tag)
+                self.stripped_heading_texts.setdefault((tag.name, tag.text.strip()), []).append(tag)
+
+    def table_value(self, table_id, label):
+        """
+        Returns the tag following the dt with the given label, or None.
+        """
+        return self.tables[table_id].get(label)
+
+    def headings_with_text(self, name, text, strip=False):
+        texts = self.stripped_heading_texts if strip else self.heading_texts
+        return texts.get((name, text), [])
+
+    def div_by_id(self, div_id):
+        return self.div_ids.get(div_id)
+
+
+def bisafans_index(soup):
+    """
+    Returns the BisafansIndex of a soup, building it on first use.
+    """
+    return cached_on_soup(soup, '_bisafans_index', BisafansIndex)
 
 def get_type(soup):
     """
     Extracts the type(s) of a Pokémon from the HTML.
     """
-    table = soup.find_all('dl', {'class': 'dl-horizontal'})[0]
-    for entry in table.find_all('dt'):
-        if entry.text != 'Typ':
-            continue
-        return [type_img.get('alt').strip() for type_img in entry.find_next().find_all('img')]
+    type_entry = bisafans_index(soup).table_value(0, 'Typ')
+    if type_entry is None:
+        return None
+    return [type_img.get('alt').strip() for type_img in type_entry.find_all('img')]
 
 def extract_p_text_between_tags(start_tag, end_tag, listlike=False):
     """
@@ -18,13 +104,8 @@ def extract_p_text_between_tags(start_tag, end_tag, listlike=False):
     if not start_tag or not end_tag:
         return "One or both tags not found."
     
-    current_tag = start_tag
-    p_texts = []
-    
-    while current_tag and current_tag != end_tag:
-        if current_tag.name == 'p':
-            p_texts.append(current_tag.get_text())
-        current_tag = current_tag.find_next()
+    # One linear scan over the precomputed document order instead of walking with find_next()
+    p_texts = [p_tag.get_text() for p_tag in document_order(start_tag).p_tags_between(start_tag, end_tag)]
 
     if listlike:
         clean_list = [re.sub(r'\[\d+\]', '', element.strip().replace('\u2060', ''))
@@ -41,11 +122,9 @@ def get_data_from_table(soup, table_id, desired_data):
     """
     Retrieves specific data from a table identified by table_id.
     """
-    table = soup.find_all('dl', {'class': 'dl-horizontal'})[table_id]
-    for entry in table.find_all('dt'):
-        if entry.text != desired_data:
-            continue
-        return entry.find_next().text
+    value = bisafans_index(soup).table_value(table_id, desired_data)
+    if value is not None:
+        return value.text
 
 def get_appearances(soup):
     """
@@ -54,18 +133,14 @@ def get_appearances(soup):
     appearances = {'Serie':[],
                    'Filme und Spezialfilme': []}
 
-    for title in soup.find_all('h4'):
-        if title.text != 'Serie':
-            continue
+    for title in bisafans_index(soup).headings_with_text('h4', 'Serie'):
         for list_element in title.find_next().find_all('li')[1::2]:
             le_text = list_element.text.strip()
             le_text = le_text[le_text.find(' ') + 1:]
             if le_text not in appearances[title.text]:
                 appearances[title.text].append(le_text)
 
-    for title in soup.find_all('h4'):
-        if title.text != 'Filme und Spezialfilme':
-            continue
+    for title in bisafans_index(soup).headings_with_text('h4', 'Filme und Spezialfilme'):
         for list_element in title.find_next().find_all('li'):
             le_text = list_element.text.strip().split('\n')[0]
             if le_text not in appearances[title.text]:
@@ -77,9 +152,7 @@ def get_trivias(soup):
     """
     Extracts trivia information of a Pokémon.
     """
-    for title in soup.find_all('h3'):
-        if title.text != 'Trivia':
-            continue
+    for title in bisafans_index(soup).headings_with_text('h3', 'Trivia'):
         if title.find_next().text.strip().split('\n') is not None:
             return title.find_next().text.strip().split('\n')
     return []
@@ -100,7 +173,7 @@ def get_evolutions(soup):
     Extracts evolution information of a Pokémon.
     """
     evo_list = []
-    for s in soup.find('div', id='evoRow').find_all('div', class_='valignBottom'):
+    for s in bisafans_index(soup).div_by_id('evoRow').find_all('div', class_='valignBottom'):
         name = s.text.strip()
         if 'Mega-' in name or 'Gigadynamax-' in name or 'Alola-' in name or 'Galar-' in name:
             continue
@@ -112,20 +185,21 @@ def get_forms(soup):
     Extracts different forms of a Pokémon.
     """
     forms = []
-    if soup.find('div', id='sonder') is None:
+    sonder = bisafans_index(soup).div_by_id('sonder')
+    if sonder is None:
         return []
     
-    if soup.find('div', id='sonder').find('h2') is None:
-        for a in soup.find('div', id='sonder').find('div', id='bilderdex').find_all('a'):
+    if sonder.find('h2') is None:
+        for a in sonder.find('div', id='bilderdex').find_all('a'):
             forms.append(a.text.strip())
         return forms
 
-    if soup.find('div', id='sonder').find('ul', class_='nav-tabs'):
-        for element in soup.find('div', id='sonder').find('ul').find_all('li'):
+    if sonder.find('ul', class_='nav-tabs'):
+        for element in sonder.find('ul').find_all('li'):
             forms.append(element.text.strip())
         return forms
     else:
-        name = soup.find('div', id='sonder').find('h2').text.strip()
+        name = sonder.find('h2').text.strip()
         return [name]
 
 def get_abilities(soup):
@@ -144,9 +218,7 @@ def get_stats(soup):
     Extracts stats of a Pokémon.
     """
     result = {}
-    for title in soup.find_all('h3'):
-        if title.text.strip() != 'Statuswerte':
-            continue
+    for title in bisafans_index(soup).headings_with_text('h3', 'Statuswerte', strip=True):
         div_tag = title.find_next()
         for row in div_tag.find_all('tr')[2:-1]:
             values = row.find_all('td')
@@ -172,7 +244,7 @@ def get_attacks(soup):
     attack_dict = {}
     
     found_attack_divs = []
-    for right_title in soup.find_all('h4'):
+    for right_title in bisafans_index(soup).headings['h4']:
         if right_title.text.strip() not in ['Durch Level-Up', 'Durch TMs']:
             continue
         else:
@@ -201,12 +273,14 @@ def get_attacks(soup):
             attack_dict[learn_typ].append([lvl, name, typ, kat, power, prec, ap])
     return attack_dict
 
-def main(bisafans_html, pokewiki_html):
+def main(bisafans_html, pokewiki_html, backend=DEFAULT_BACKEND, partial_parse=False):
     """
     Main function to create BeautifulSoup objects and extract data using all defined functions.
+    backend selects the tree builder, see html_backend.BACKENDS.
+    With partial_parse only the parts of the Bisafans page read by the extractors are built.
     """
-    bisafans_soup = BeautifulSoup(bisafans_html, 'html.parser')
-    pokewiki_soup = BeautifulSoup(pokewiki_html, 'html.parser')
+    bisafans_soup = make_soup(bisafans_html, backend, BisafansStrainer() if partial_parse else None)
+    pokewiki_soup = make_soup(pokewiki_html, backend)
 
     # Locate the start and end tags for the intro and biology sections
     intro_first_tag = pokewiki_soup.find('table', {'class': 'infobox-pokemon'})
@@ -245,3 +319,12 @@ def main(bisafans_html, pokewiki_html):
     }
 
     return data
+
+
+def compare_partial_parse(bisafans_html, pokewiki_html, backend=DEFAULT_BACKEND):
+    """
+    Parses a page pair fully and with partial_parse and returns the fields whose values differ.
+    """
+    full = main(bisafans_html, pokewiki_html, backend)
+    partial = main(bisafans_html, pokewiki_html, backend, partial_parse=True)
+    return {field: (full[field], partial.get(field)) for field in full if full[field] != partial.get(field)}
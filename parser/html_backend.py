@@ -0,0 +1,50 @@
+from bs4 import BeautifulSoup
+
+# Tree builders the parsers can run on. 'lxml' needs the lxml package and is several
+# times faster than the pure Python 'html.parser'.
+BACKENDS = ['html.parser', 'lxml']
+DEFAULT_BACKEND = 'html.parser'
+
+
+def make_soup(html, backend=DEFAULT_BACKEND, parse_only=None):
+    """
+    Creates a BeautifulSoup object of an html page with the given tree builder.
+    parse_only is an optional SoupStrainer restricting which parts of the page are built.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown html backend '{backend}', choose one of {BACKENDS}")
+    return BeautifulSoup(html, backend, parse_only=parse_only)
+
+
+def cached_on_soup(soup, attr, factory):
+    """
+    Returns the value stored under attr on a soup, creating it with factory(soup) on first use.
+    Used for lookup structures that are built once per page and shared by the extractors.
+    """
+    # vars() is used because attribute access on a soup falls back to searching for a tag of that name
+    value = vars(soup).get(attr)
+    if value is None:
+        value = factory(soup)
+        setattr(soup, attr, value)
+    return value
+
+
+def compare_backends(parse, pages, backends=BACKENDS):
+    """
+    Runs a parser main function with every backend on each page and collects the fields
+    in which the results differ from the first backend.
+
+    :param parse: Parser main function accepting a backend keyword, e.g. english_parser.main
+    :param pages: List of argument tuples for parse, e.g. [(bulbapedia_html,)]
+    :param backends: Backends to compare
+    :return: List of (page number, field, {backend: value}) tuples, empty if all backends agree
+    """
+    differences = []
+    for page_number, args in enumerate(pages):
+        results = {backend: parse(*args, backend=backend) for backend in backends}
+        reference = results[backends[0]]
+        for field in reference:
+            values = {backend: result.get(field) for backend, result in results.items()}
+            if any(value != reference[field] for value in values.values()):
+                differences.append((page_number, field, values))
+    return differences
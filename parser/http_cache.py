@@ -0,0 +1,71 @@
+import os
+import json
+import hashlib
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache keyed by URL that remembers ETag and Last-Modified validators,
+    so unchanged pages can be revalidated with a conditional GET instead of downloaded again.
+    Bodies that are kept elsewhere, e.g. in a page archive, are stored without a body file.
+    """
+    def __init__(self, cache_directory):
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        base = os.path.join(self.cache_directory, key)
+        return base + '.json', base + '.html'
+
+    def _load_meta(self, url):
+        meta_path, body_path = self._paths(url)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def conditional_headers(self, url):
+        """
+        Returns the If-None-Match / If-Modified-Since headers for a cached URL.
+        """
+        meta = self._load_meta(url)
+        headers = {}
+        if meta is None:
+            return headers
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load(self, url):
+        """
+        Returns the cached body of a URL or None if it is not cached.
+        """
+        if not self.has_body(url):
+            return None
+        with open(self._paths(url)[1], 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def has_body(self, url):
+        return all(os.path.exists(path) for path in self._paths(url))
+
+    def store(self, url, headers, content, store_body=True):
+        """
+        Stores the validators of a response, and with store_body its body.
+        Responses without ETag and Last-Modified can not be revalidated and are not cached.
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        meta_path, body_path = self._paths(url)
+        if store_body:
+            with open(body_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+        elif os.path.exists(body_path):
+            os.remove(body_path)
+        # The metadata is written last so a partially written entry is never used
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified}, f)
@@ -0,0 +1,75 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+# Source keys in the order of the data directories
+SOURCES = ['bisafans', 'pokewiki', 'bulbapedia']
+
+MANIFEST_PATH = '../data/manifest.json'
+
+
+def dex_key(dex):
+    """
+    Returns the four digit key of a dex number, e.g. 1 -> '0001'.
+    """
+    return str(dex + 10000)[-4:]
+
+
+def content_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """
+    Loads the download manifest: dex key -> source -> page entry.
+    """
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_json(data, path, **dump_options):
+    """
+    Writes data as json to '<path>.tmp' and moves it into place, so an interrupted run never leaves a partial file.
+    """
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **dump_options)
+    os.replace(tmp_path, path)
+
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """
+    Writes the download manifest atomically.
+    """
+    save_json(manifest, manifest_path, indent=1, sort_keys=True)
+
+
+def record_page(manifest, source, dex, name, url, content, path, archived=False):
+    """
+    Records where the page of a source for a dex number is stored, with its URL, hash and fetch time.
+    """
+    manifest.setdefault(dex_key(dex), {})[source] = {
+        'name': name,
+        'url': url,
+        'path': path,
+        'archived': archived,
+        'sha256': content_hash(content),
+        'fetched': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+
+def complete_entries(manifest, dex_numbers=None):
+    """
+    Yields (dex key, entry) for every Pokémon whose pages of all sources are present.
+    dex_numbers restricts the result to the given Pokémon.
+    """
+    keys = sorted(manifest) if dex_numbers is None else [dex_key(dex) for dex in dex_numbers]
+    for key in keys:
+        entry = manifest.get(key)
+        if entry is None or any(source not in entry for source in SOURCES):
+            print(f"Skipping {key}, page missing in one of the sources")
+            continue
+        yield key, entry
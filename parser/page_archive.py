@@ -0,0 +1,181 @@
+import os
+import json
+import gzip
+import mmap
+
+RECORD_MAGIC = b'PAGE '
+
+# Share of superseded records above which an archive is compacted
+COMPACT_THRESHOLD = 0.25
+
+
+def archive_path(directory):
+    """
+    Returns the path of the page archive belonging to a source data directory.
+    """
+    return os.path.normpath(directory) + '.pages'
+
+
+class IndexedRecords:
+    """
+    Read access to a file of records with a '<path>.idx' JSON lines index of their dex, name, offset and length.
+    The file is memory-mapped on the first read. Index lines of records that did not reach the disk
+    before an interruption are ignored, if a dex is indexed twice the later record wins.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.entries = {}
+        self.dead_records = 0
+        self._mmap = None
+        self._file = None
+        if os.path.exists(self.index_path):
+            data_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line of an interrupted run
+                        continue
+                    if entry['offset'] + entry['length'] <= data_size:
+                        if entry['dex'] in self.entries:
+                            self.dead_records += 1
+                        self.entries[entry['dex']] = entry
+
+    def dex_numbers(self):
+        """
+        Returns the stored dex numbers in ascending order.
+        """
+        return sorted(self.entries)
+
+    def name(self, dex):
+        return self.entries[dex]['name']
+
+    def read_raw(self, dex):
+        """
+        Returns the stored bytes of a dex number.
+        The file is mapped again if the record was appended after it was mapped.
+        """
+        entry = self.entries[dex]
+        if self._mmap is not None and entry['offset'] + entry['length'] > len(self._mmap):
+            self._close_mmap()
+        if self._mmap is None:
+            self._file = open(self.path, 'rb')
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap[entry['offset']:entry['offset'] + entry['length']]
+
+    def __contains__(self, dex):
+        return dex in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        self._close_mmap()
+
+    def _close_mmap(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._file.close()
+            self._mmap = None
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PageArchive(IndexedRecords):
+    """
+    Append-only archive of gzip compressed html pages with an offset index.
+
+    Every record is a header line 'PAGE <json>' followed by the compressed page, so the
+    archive can be scanned on its own. The offsets are additionally kept in a
+    '<archive>.idx' JSON lines file for random access by dex number. If a page is
+    appended twice the later record wins, the superseded records are dropped by compact.
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self._writer = None
+        self._index_writer = None
+
+    def append(self, dex, name, content, url=None):
+        """
+        Compresses a page and appends it to the archive.
+        The write is buffered, call sync to make it durable.
+        """
+        if self._writer is None:
+            self.close()
+            self._writer = open(self.path, 'ab')
+            self._index_writer = open(self.index_path, 'a', encoding='utf-8')
+        payload = gzip.compress(content.encode('utf-8'))
+        header = {'dex': dex, 'name': name, 'url': url, 'length': len(payload)}
+        self._writer.write(RECORD_MAGIC + json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+        offset = self._writer.tell()
+        self._writer.write(payload + b'\n')
+        entry = dict(header, offset=offset)
+        self._index_writer.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        if dex in self.entries:
+            self.dead_records += 1
+        self.entries[dex] = entry
+
+    def sync(self):
+        """
+        Flushes appended records to disk, the data before the index.
+        """
+        if self._writer is None:
+            return
+        for writer in (self._writer, self._index_writer):
+            writer.flush()
+            os.fsync(writer.fileno())
+
+    def read(self, dex):
+        """
+        Returns the decompressed page for a dex number, including pages appended since the archive was opened.
+        """
+        if self._writer is not None:
+            self._writer.flush()
+        return gzip.decompress(self.read_raw(dex)).decode('utf-8')
+
+    def needs_compaction(self, threshold=COMPACT_THRESHOLD):
+        return self.dead_records > threshold * len(self.entries)
+
+    def compact(self):
+        """
+        Rewrites the archive and its index with only the latest record of every dex number.
+        Both files are written under temporary names and renamed, the data before the index.
+        """
+        self.close()
+        entries = {}
+        with open(self.path, 'rb') as f, open(self.path + '.compact', 'wb') as writer, \
+                open(self.index_path + '.compact', 'w', encoding='utf-8') as index_writer:
+            for dex in self.dex_numbers():
+                entry = self.entries[dex]
+                f.seek(entry['offset'])
+                payload = f.read(entry['length'])
+                header = {key: entry[key] for key in ['dex', 'name', 'url', 'length']}
+                writer.write(RECORD_MAGIC + json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+                entries[dex] = dict(header, offset=writer.tell())
+                writer.write(payload + b'\n')
+                index_writer.write(json.dumps(entries[dex], ensure_ascii=False) + '\n')
+            for output in (writer, index_writer):
+                output.flush()
+                os.fsync(output.fileno())
+        os.replace(self.path + '.compact', self.path)
+        os.replace(self.index_path + '.compact', self.index_path)
+        self.entries = entries
+        self.dead_records = 0
+
+    def close(self):
+        if self._writer is not None:
+            self.sync()
+            self._writer.close()
+            self._index_writer.close()
+            self._writer = None
+            self._index_writer = None
+        super().close()
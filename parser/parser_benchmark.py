@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import tracemalloc
+import german_parser
+import english_parser
+import poke_xml_creator
+from html_backend import BACKENDS, DEFAULT_BACKEND, make_soup
+from manifest import SOURCES, dex_key, load_manifest
+from page_archive import PageArchive
+
+FIXTURE_DIRECTORY = 'benchmark_fixtures'
+
+# Pokémon whose pages are frozen as fixtures: a simple one and the special cases of the parsers
+FIXTURE_POKEMON = {
+    1: 'Bulbasaur',
+    492: 'Shaymin',
+    718: 'Zygarde',
+    999: 'Gimmighoul',
+    1017: 'Ogerpon',
+}
+
+
+def fixture_path(fixture_directory, dex, source):
+    return os.path.join(fixture_directory, f'{dex_key(dex)}_{source}.html')
+
+
+def freeze_fixtures(data_directories, fixture_directory=FIXTURE_DIRECTORY, manifest_path=None):
+    """
+    Copies the downloaded pages of the FIXTURE_POKEMON into the fixture directory,
+    either through the download manifest or by dex prefix from the html directories.
+    """
+    os.makedirs(fixture_directory, exist_ok=True)
+    manifest = load_manifest(manifest_path) if manifest_path else None
+    for dex in FIXTURE_POKEMON:
+        for source, directory in zip(SOURCES, data_directories):
+            target = fixture_path(fixture_directory, dex, source)
+            if manifest is not None:
+                page = manifest[dex_key(dex)][source]
+                if page['archived']:
+                    with PageArchive(page['path']) as archive, open(target, 'w', encoding='utf-8') as f:
+                        f.write(archive.read(dex))
+                else:
+                    shutil.copyfile(page['path'], target)
+                continue
+            file_name = next(file_name for file_name in sorted(os.listdir(directory))
+                             if file_name.startswith(dex_key(dex) + '_') and file_name.endswith('.html'))
+            shutil.copyfile(os.path.join(directory, file_name), target)
+        print(f"Froze fixtures of {dex_key(dex)} {FIXTURE_POKEMON[dex]}")
+
+
+def load_fixtures(fixture_directory=FIXTURE_DIRECTORY):
+    """
+    Returns {dex: {source: html}} for all fixture Pokémon whose three pages are present.
+    """
+    fixtures = {}
+    for dex in FIXTURE_POKEMON:
+        paths = {source: fixture_path(fixture_directory, dex, source) for source in SOURCES}
+        if not all(os.path.exists(path) for path in paths.values()):
+            print(f"Missing fixtures for {dex_key(dex)} {FIXTURE_POKEMON[dex]}, freeze them with --freeze")
+            continue
+        fixtures[dex] = {}
+        for source, path in paths.items():
+            with open(path, 'r', encoding='utf-8') as f:
+                fixtures[dex][source] = f.read()
+    return fixtures
+
+
+def english_steps(html, backend):
+    """
+    Returns the steps of english_parser.main as (label, function) pairs, in the order main runs them.
+    """
+    state = {}
+
+    def soup():
+        state['soup'] = make_soup(html, backend)
+
+    def name():
+        state['name'] = english_parser.get_name(state['soup'])
+
+    steps = [('make_soup', soup),
+             ('section_index', lambda: english_parser.section_index(state['soup'])),
+             ('get_name', name)]
+    for extractor in ['get_dex_number', 'get_category', 'get_type', 'get_introduction', 'get_stats', 'get_egg_data',
+                      'get_gender', 'get_physique', 'get_biology', 'get_pokedex_entries', 'get_major_appearances',
+                      'get_learnset', 'get_trivia']:
+        steps.append((extractor, lambda function=getattr(english_parser, extractor): function(state['soup'])))
+    for extractor in ['get_ability', 'get_evolution', 'get_form']:
+        steps.append((extractor, lambda function=getattr(english_parser, extractor): function(state['soup'], state['name'])))
+    return steps
+
+
+def german_steps(bisafans_html, pokewiki_html, backend, partial_parse=False):
+    """
+    Returns the steps of german_parser.main as (label, function) pairs, in the order main runs them.
+    """
+    state = {}
+
+    def soups():
+        strainer = german_parser.BisafansStrainer() if partial_parse else None
+        state['bisafans'] = make_soup(bisafans_html, backend, strainer)
+        state['pokewiki'] = make_soup(pokewiki_html, backend)
+
+    def intro_and_biology():
+        pokewiki_soup = state['pokewiki']
+        biology_end_id = 'In_den_Hauptspielen' if 'id="In_den_Hauptspielen"' in pokewiki_html else 'In_den_Spielen'
+        german_parser.extract_p_text_between_tags(pokewiki_soup.find('table', {'class': 'infobox-pokemon'}),
+                                                  pokewiki_soup.find('div', {'id': 'toc'}))
+        german_parser.extract_p_text_between_tags(pokewiki_soup.find('span', {'id': 'Spezies'}),
+                                                  pokewiki_soup.find('span', {'id': biology_end_id}), True)
+
+    steps = [('make_soup', soups),
+             ('bisafans_index', lambda: german_parser.bisafans_index(state['bisafans'])),
+             ('extract_p_text_between_tags', intro_and_biology)]
+    for extractor in ['get_type', 'get_appearances', 'get_trivias', 'get_gender_ratio', 'get_evolutions', 'get_forms',
+                      'get_abilities', 'get_stats', 'get_physique', 'get_attacks']:
+        steps.append((extractor, lambda function=getattr(german_parser, extractor): function(state['bisafans'])))
+    steps.append(('get_data_from_table', lambda: german_parser.get_data_from_table(state['bisafans'], 0, 'Art')))
+    return steps
+
+
+def run_steps(steps, timings, allocations=None):
+    """
+    Runs the steps and adds their wall time, and with allocations their peak traced memory, to the results.
+    """
+    for label, function in steps:
+        if allocations is not None:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        function()
+        timings.setdefault(label, []).append(time.perf_counter() - start)
+        if allocations is not None:
+            allocations[label] = max(allocations.get(label, 0), tracemalloc.get_traced_memory()[1] - before)
+
+
+def benchmark(fixtures, repeat=5, backend=DEFAULT_BACKEND, partial_parse=False):
+    """
+    Benchmarks both parsers per extractor and the full xml creation on the fixture pages.
+
+    :return: Dict with per-extractor timings and allocations and pages per second
+    """
+    results = {'backend': backend, 'partial_parse': partial_parse, 'pages': len(fixtures), 'parsers': {}}
+    parsers = {
+        'english_parser': lambda pages: english_steps(pages['bulbapedia'], backend),
+        'german_parser': lambda pages: german_steps(pages['bisafans'], pages['pokewiki'], backend, partial_parse),
+    }
+    for parser_name, make_steps in parsers.items():
+        timings = {}
+        allocations = {}
+        for _ in range(repeat):
+            for pages in fixtures.values():
+                run_steps(make_steps(pages), timings)
+        # Allocations are measured in a separate pass as tracing slows down every step
+        tracemalloc.start()
+        for pages in fixtures.values():
+            run_steps(make_steps(pages), {}, allocations)
+        tracemalloc.stop()
+        total = sum(sum(values) for values in timings.values())
+        results['parsers'][parser_name] = {
+            'extractors': {label: {'calls': len(values),
+                                   'mean_ms': 1000 * sum(values) / len(values),
+                                   'peak_kib': allocations.get(label, 0) / 1024}
+                           for label, values in timings.items()},
+            'pages_per_second': len(fixtures) * repeat / total if total else 0.0,
+        }
+
+    # Full pipeline of poke_xml_creator: parse both sources, build the dict and write the xml file
+    with tempfile.TemporaryDirectory() as target_directory:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for dex, pages in fixtures.items():
+                page = (dex_key(dex), FIXTURE_POKEMON[dex], pages['bisafans'], pages['pokewiki'], pages['bulbapedia'],
+                        os.path.join(target_directory, dex_key(dex) + '.xml'))
+                poke_xml_creator.process_pokemon(page, backend, partial_parse)
+        elapsed = time.perf_counter() - start
+    results['poke_xml_creator'] = {'pages_per_second': len(fixtures) * repeat / elapsed if elapsed else 0.0}
+    return results
+
+
+def print_report(results):
+    print(f"Backend {results['backend']}, partial parse {results['partial_parse']}, {results['pages']} fixture Pokémon")
+    for parser_name, parser_results in results['parsers'].items():
+        print(f"\n{parser_name}: {parser_results['pages_per_second']:.1f} pages/s")
+        print(f"{'step':<30}{'calls':>8}{'mean ms':>12}{'peak KiB':>12}")
+        for label, values in sorted(parser_results['extractors'].items(), key=lambda item: -item[1]['mean_ms']):
+            print(f"{label:<30}{values['calls']:>8}{values['mean_ms']:>12.3f}{values['peak_kib']:>12.1f}")
+    print(f"\npoke_xml_creator: {results['poke_xml_creator']['pages_per_second']:.1f} Pokémon/s")
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Returns the steps whose mean time grew by more than the threshold factor compared to a baseline result.
+    """
+    regressions = []
+    for parser_name, parser_results in results['parsers'].items():
+        baseline_extractors = baseline.get('parsers', {}).get(parser_name, {}).get('extractors', {})
+        for label, values in parser_results['extractors'].items():
+            baseline_values = baseline_extractors.get(label)
+            if baseline_values and values['mean_ms'] > threshold * baseline_values['mean_ms']:
+                regressions.append((parser_name, label, baseline_values['mean_ms'], values['mean_ms']))
+    return regressions
+
+
+if __name__ == "__main__":
+    import argparse
+
+    argument_parser = argparse.ArgumentParser(description='Benchmark the parsers on frozen html fixtures.')
+    argument_parser.add_argument('--fixtures', default=FIXTURE_DIRECTORY)
+    argument_parser.add_argument('--freeze', action='store_true', help='copy the fixture pages from the downloaded data')
+    argument_parser.add_argument('--data', nargs=3, default=['../data/bisafans_data', '../data/pokewiki_data', '../data/bulbapedia_data'],
+                                 metavar=('BISAFANS', 'POKEWIKI', 'BULBAPEDIA'))
+    argument_parser.add_argument('--manifest', help='freeze the fixtures through the download manifest')
+    argument_parser.add_argument('--repeat', type=int, default=5)
+    argument_parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND)
+    argument_parser.add_argument('--partial-parse', action='store_true')
+    argument_parser.add_argument('--save', help='write the results as json, e.g. as a new baseline')
+    argument_parser.add_argument('--compare', help='json results of an earlier run to check for regressions')
+    argument_parser.add_argument('--threshold', type=float, default=1.25, help='allowed slowdown factor per step')
+    args = argument_parser.parse_args()
+
+    if args.freeze:
+        freeze_fixtures(args.data, args.fixtures, args.manifest)
+
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        sys.exit("No fixtures found")
+
+    results = benchmark(fixtures, args.repeat, args.backend, args.partial_parse)
+    print_report(results)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.threshold)
+        for parser_name, label, before, after in regressions:
+            print(f"Regression in {parser_name}.{label}: {before:.3f} ms -> {after:.3f} ms")
+        if regressions:
+            sys.exit(1)
@@ -1,8 +1,17 @@
 import os
+import json
+import time
+import random
 import aiohttp
 import asyncio
-import requests
+from contextlib import asynccontextmanager
+from functools import partial
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
 from bs4 import BeautifulSoup
+from http_cache import HttpCache
+from page_archive import PageArchive, archive_path
+from manifest import SOURCES, MANIFEST_PATH, dex_key, content_hash, load_manifest, save_manifest, save_json, record_page
 
 
 # Ensure the directories for storing data exist
@@ -10,17 +19,62 @@ os.makedirs('../data/pokewiki_data', exist_ok=True)
 os.makedirs('../data/bisafans_data', exist_ok=True)
 os.makedirs('../data/bulbapedia_data', exist_ok=True)
 
+# Download limits. All three sources are single hosts, so the per-host values are
+# what actually keeps us below their throttling thresholds.
+MAX_IN_FLIGHT = 24
+PER_HOST_LIMIT = 8
+REQUESTS_PER_SECOND = 10
+BURST = 10
+KEEPALIVE_TIMEOUT = 30
 
-def get_pokewiki_data():
+# Retry settings for single page downloads
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# URLs that still failed after all retries, grouped by storing directory
+FAILED_LEDGER_PATH = '../data/failed_downloads.json'
+
+# Pages and their ETag/Last-Modified validators for conditional re-crawls
+HTTP_CACHE_DIRECTORY = '../data/http_cache'
+
+# Number of stored pages after which written data is fsynced
+FSYNC_BATCH = 50
+
+# Index pages listing all Pokémon of a source
+BISAFANS_INDEX_URL = 'https://www.bisafans.de/pokedex/listen/numerisch.php'
+POKEWIKI_INDEX_URL = 'https://www.pokewiki.de/Pok%C3%A9mon-Liste'
+BULBAPEDIA_INDEX_URL = 'https://bulbapedia.bulbagarden.net/wiki/List_of_Pok%C3%A9mon_by_National_Pok%C3%A9dex_number'
+
+
+def row_dex_number(row):
     """
-    Fetches Pokémon names and their corresponding links from PokéWiki.
+    Returns the National Dex number in the first numeric cell of an index table row, e.g. '#0025' or '025'.
     """
-    url = 'https://www.pokewiki.de/Pok%C3%A9mon-Liste'
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+    for cell in row.find_all(['td', 'th']):
+        text = cell.text.strip().lstrip('#')
+        if text.isdigit():
+            return int(text)
+    return None
+
+
+def with_dex_numbers(names, links, dex_numbers):
+    """
+    Fills in missing dex numbers from the list position, for rows without a number cell.
+    """
+    return names, links, [dex if dex is not None else position for position, dex in enumerate(dex_numbers, 1)]
+
+
+def get_pokewiki_data(html):
+    """
+    Extracts Pokémon names, their corresponding links and dex numbers from the PokéWiki index page.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
 
     all_names = []
     all_links = []
+    all_dex_numbers = []
 
     # Iterate over each row in the table, skipping the header
     for row in soup.find('tbody').find_all('tr')[1:]:
@@ -28,20 +82,20 @@ def get_pokewiki_data():
         link = 'https://www.pokewiki.de' + row.find('a').get('href')
         all_names.append(name)
         all_links.append(link)
+        all_dex_numbers.append(row_dex_number(row))
 
-    return all_names, all_links
+    return with_dex_numbers(all_names, all_links, all_dex_numbers)
 
 
-def get_bisafans_data():
+def get_bisafans_data(html):
     """
-    Fetches Pokémon names and their corresponding links from Bisafans.
+    Extracts Pokémon names, their corresponding links and dex numbers from the Bisafans index page.
     """
-    url = 'https://www.bisafans.de/pokedex/listen/numerisch.php'
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
 
     all_names = []
     all_links = []
+    all_dex_numbers = []
 
     # Iterate over each row in the table
     for row in soup.find('tbody').find_all('tr'):
@@ -49,88 +103,400 @@ def get_bisafans_data():
         link = row.find('a').get('href')
         all_names.append(name)
         all_links.append(link)
+        all_dex_numbers.append(row_dex_number(row))
 
-    return all_names, all_links
+    return with_dex_numbers(all_names, all_links, all_dex_numbers)
 
 
-def get_bulbapedia_data():
+def get_bulbapedia_data(html):
     """
-    Fetches Pokémon names and their corresponding links from Bulbapedia.
+    Extracts Pokémon names, their corresponding links and dex numbers from the Bulbapedia index page.
     """
-    url = 'https://bulbapedia.bulbagarden.net/wiki/List_of_Pok%C3%A9mon_by_National_Pok%C3%A9dex_number'
-    html = requests.get(url)
-    soup = BeautifulSoup(html.text, 'html.parser')
+    soup = BeautifulSoup(html, 'html.parser')
 
-    all_names = []
-    all_links = []
+    # Name -> (link, dex number), regional forms repeat the row of a Pokémon
+    pokemon = {}
 
     for tbody in soup.find_all('tbody')[1:-3]:
         for row in tbody.find_all('tr')[1:]:
             name = row.find_all('a')[1].text
             link = 'https://bulbapedia.bulbagarden.net' + row.find_all('a')[1].get('href')
 
-            all_names.append(name)
-            all_links.append(link)
+            pokemon.setdefault(name, (link, row_dex_number(row)))
 
-    all_names = list(dict.fromkeys(all_names))
-    all_links = list(dict.fromkeys(all_links))
+    return with_dex_numbers(list(pokemon), [link for link, _ in pokemon.values()],
+                            [dex for _, dex in pokemon.values()])
 
-    return all_names, all_links
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate against a single host.
+    """
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Waits until a token is available and takes it.
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DownloadScheduler:
+    """
+    Limits the number of requests in flight, globally and per host, and the request rate per host.
+    """
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, per_host_limit=PER_HOST_LIMIT,
+                 requests_per_second=REQUESTS_PER_SECOND, burst=BURST):
+        self.max_in_flight = max_in_flight
+        self.per_host_limit = per_host_limit
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.in_flight = asyncio.Semaphore(max_in_flight)
+        self.host_slots = {}
+        self.host_buckets = {}
+
+    def _host_limits(self, host):
+        if host not in self.host_slots:
+            self.host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+            self.host_buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        return self.host_slots[host], self.host_buckets[host]
+
+    @asynccontextmanager
+    async def slot(self, url):
+        """
+        Holds a host slot and a global slot for the duration of one request.
+        """
+        host_slot, bucket = self._host_limits(urlsplit(url).netloc)
+        async with host_slot:
+            await bucket.acquire()
+            async with self.in_flight:
+                yield
+
+    def create_session(self):
+        """
+        Creates a session whose connector pools keep-alive connections within the same limits.
+        """
+        connector = aiohttp.TCPConnector(limit=self.max_in_flight, limit_per_host=self.per_host_limit,
+                                         keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300)
+        return aiohttp.ClientSession(connector=connector)
+
+
+class RetryableError(Exception):
+    """
+    Raised for responses that are worth retrying, e.g. 503 or 429.
+    """
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.retry_after = retry_after
 
 
-async def fetch(session, url):
+def parse_retry_after(value):
     """
-    Asynchronously fetches the content of a URL.
+    Converts a Retry-After header (seconds or HTTP date) into seconds to wait.
     """
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
     try:
-        async with session.get(url) as response:
-            content = await response.text()
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None):
+    """
+    Returns the delay before the next attempt using exponential backoff with full jitter.
+    A Retry-After sent by the server is used as the lower bound.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, BACKOFF_MAX))
+    return delay
+
+
+async def fetch(session, url, scheduler, max_retries=MAX_RETRIES, cache=None, load_stored=None, store_body=True):
+    """
+    Asynchronously fetches the content of a URL, retrying transient failures.
+    If a cache is given the request is conditional and a 304 answer returns the cached page.
+    load_stored returns the page from where it is already stored, e.g. the page archive, instead of the cache.
+    Without store_body the cache only keeps the validators and not a second copy of the page.
+    """
+    headers = {}
+    if cache and (load_stored is not None or cache.has_body(url)):
+        headers = cache.conditional_headers(url)
+    for attempt in range(max_retries + 1):
+        retry_after = None
+        try:
+            async with scheduler.slot(url):
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and headers:
+                        print(f"Not modified {url}")
+                        return load_stored() if load_stored is not None else cache.load(url)
+                    if response.status in RETRY_STATUSES:
+                        raise RetryableError(response.status, parse_retry_after(response.headers.get('Retry-After')))
+                    response.raise_for_status()
+                    content = await response.text()
+                    if cache:
+                        cache.store(url, response.headers, content, store_body)
             print(f"Downloaded {url} with length {len(content)}")
             return content
-    except Exception as e:
-        print(f"Failed to download {url}: {e}")
-        return None
+        except aiohttp.ClientResponseError as e:
+            # Other 4xx responses will not change on a retry
+            print(f"Failed to download {url}: {e}")
+            return None
+        except (RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if isinstance(e, RetryableError):
+                retry_after = e.retry_after
+            if attempt == max_retries:
+                print(f"Failed to download {url} after {attempt + 1} attempts: {e}")
+                return None
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+        except Exception as e:
+            print(f"Failed to download {url}: {e}")
+            return None
+
+
+async def download_pages(session, scheduler, pages, on_page, cache=None, archive=None):
+    """
+    Downloads (dex, name, url) pages asynchronously and hands every page to on_page as soon as it arrives.
+    A fixed number of workers pulls from a bounded queue, so memory does not grow with the number of pages.
+    With an archive, pages answered with 304 are read from it instead of the HTTP cache.
+    """
+    queue = asyncio.Queue(maxsize=scheduler.max_in_flight * 2)
+
+    async def worker():
+        while True:
+            page = await queue.get()
+            if page is None:
+                return
+            dex, name, url = page
+            load_stored = partial(archive.read, dex) if archive is not None and dex in archive else None
+            content = await fetch(session, url, scheduler, cache=cache, load_stored=load_stored,
+                                  store_body=archive is None)
+            on_page(dex, name, url, content)
+
+    workers = [asyncio.create_task(worker()) for _ in range(scheduler.max_in_flight)]
+    for page in pages:
+        await queue.put(page)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+
+
+async def download_all_sites(pages, on_page, scheduler=None, cache=None):
+    """
+    Downloads a list of (dex, name, url) pages in a session of its own.
+    """
+    if scheduler is None:
+        scheduler = DownloadScheduler()
+    async with scheduler.create_session() as session:
+        await download_pages(session, scheduler, pages, on_page, cache)
 
 
-async def download_all_sites(urls):
+def page_filename(name, dex):
     """
-    Downloads content from a list of URLs asynchronously.
+    Returns the file name of a page, e.g. 0001_Bisasam.html.
     """
-    async with aiohttp.ClientSession() as session:
-        tasks = [asyncio.create_task(fetch(session, url)) for url in urls]
-        results = await asyncio.gather(*tasks)
-        return results
+    name = name.replace(':','')
+    return str(dex+10000)[-4:] + '_' + name + ".html"
 
 
-def save_to_file(name, content, index, directory):
+def save_to_file(name, content, dex, directory):
     """
     Saves the content to a file in the specified directory.
+    The file is written under a temporary name first so an interrupted write never looks complete.
     """
-    name = name.replace(':','')
-    filename = str(index+10001)[-4:] + '_' + name + ".html"
-    filepath = os.path.join(directory, filename)
+    filepath = os.path.join(directory, page_filename(name, dex))
 
-    with open(filepath, 'w', encoding='utf-8') as f:
+    with open(filepath + '.part', 'w', encoding='utf-8') as f:
         f.write(content)
+    os.replace(filepath + '.part', filepath)
+    return filepath
+
+
+class PageWriter:
+    """
+    Stores downloaded pages of one source as they arrive, either as html files or in a page archive,
+    and fsyncs the written data every fsync_batch pages. Stored pages are recorded in the manifest,
+    which is saved after each fsync so it never points to data that is not on disk.
+    """
+    def __init__(self, storing_dir, source, manifest, manifest_path=MANIFEST_PATH, use_archive=False,
+                 fsync_batch=FSYNC_BATCH):
+        self.storing_dir = storing_dir
+        self.source = source
+        self.manifest = manifest
+        self.manifest_path = manifest_path
+        self.archive = PageArchive(archive_path(storing_dir)) if use_archive else None
+        self.fsync_batch = fsync_batch
+        self.unsynced = []
+        self.failed = {}
+
+    def is_stored(self, dex, name):
+        """
+        Checks whether a page was already stored by an earlier, possibly interrupted run.
+        """
+        if self.archive is not None:
+            return dex in self.archive
+        return os.path.exists(os.path.join(self.storing_dir, page_filename(name, dex)))
+
+    def is_unchanged(self, dex, content):
+        """
+        Checks whether the archive already holds this content for the dex number, e.g. after a 304.
+        """
+        entry = self.manifest.get(dex_key(dex), {}).get(self.source)
+        return (dex in self.archive and entry is not None and entry['archived'] and entry['path'] == self.archive.path
+                and entry['sha256'] == content_hash(content))
+
+    def write(self, dex, name, url, content):
+        if not content:
+            self.failed[str(dex)] = {'name': name, 'url': url}
+            return
+        if self.archive is not None and self.is_unchanged(dex, content):
+            return
+        if self.archive is not None:
+            save_to_archive(name, content, dex, self.archive, url)
+            self.unsynced.append(None)
+            record_page(self.manifest, self.source, dex, name, url, content, self.archive.path, archived=True)
+        else:
+            filepath = save_to_file(name, content, dex, self.storing_dir)
+            self.unsynced.append(filepath)
+            record_page(self.manifest, self.source, dex, name, url, content, filepath)
+        if len(self.unsynced) >= self.fsync_batch:
+            self.sync()
+
+    def sync(self):
+        if self.archive is not None:
+            self.archive.sync()
+        else:
+            for filepath in self.unsynced:
+                with open(filepath, 'rb') as f:
+                    os.fsync(f.fileno())
+            if self.unsynced and hasattr(os, 'O_DIRECTORY'):
+                directory_fd = os.open(self.storing_dir, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(directory_fd)
+                finally:
+                    os.close(directory_fd)
+        if self.unsynced:
+            save_manifest(self.manifest, self.manifest_path)
+        self.unsynced = []
+
+    def close(self):
+        self.sync()
+        if self.archive is not None:
+            if self.archive.needs_compaction():
+                print(f"Compacting {self.archive.path}")
+                self.archive.compact()
+            self.archive.close()
+
+
+def load_failed_ledger(ledger_path=FAILED_LEDGER_PATH):
+    """
+    Loads the ledger of failed downloads, keyed by storing directory and dex number.
+    """
+    if not os.path.exists(ledger_path):
+        return {}
+    with open(ledger_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_failed_ledger(ledger, ledger_path=FAILED_LEDGER_PATH):
+    """
+    Writes the ledger of failed downloads atomically.
+    """
+    save_json(ledger, ledger_path, indent=2)
+
+
+def save_to_archive(name, content, dex, archive, url=None):
+    """
+    Appends the content to the page archive of a source, keyed by its dex number.
+    """
+    archive.append(dex, name.replace(':', ''), content, url)
+
+
+async def crawl_source(session, scheduler, cache, storing_dir, source, index_url, data_func, ledger, ledger_path,
+                       manifest, manifest_path, retry_failed=False, use_archive=False, resume=False):
+    """
+    Fetches the index page of one source and downloads all of its Pokémon pages.
+    The failure ledger is updated as soon as the source is finished.
+    """
+    if retry_failed:
+        entries = ledger.get(storing_dir, {})
+        if not entries:
+            return
+        pages = [(int(dex), entry['name'], entry['url']) for dex, entry in entries.items()]
+    else:
+        index_html = await fetch(session, index_url, scheduler, cache=cache)
+        if index_html is None:
+            print(f"Skipping {storing_dir}, index page could not be downloaded")
+            return
+        names, urls, dex_numbers = data_func(index_html)
+        pages = list(zip(dex_numbers, names, urls))
+
+    writer = PageWriter(storing_dir, source, manifest, manifest_path, use_archive)
+    if resume:
+        pages = [page for page in pages if not writer.is_stored(page[0], page[1])]
+    try:
+        await download_pages(session, scheduler, pages, writer.write, cache, writer.archive)
+    finally:
+        writer.close()
+
+    if writer.failed:
+        ledger[storing_dir] = writer.failed
+        print(f"{len(writer.failed)} pages failed for {storing_dir}, run again with retry_failed=True")
+    else:
+        ledger.pop(storing_dir, None)
+    save_failed_ledger(ledger, ledger_path)
+
 
+async def crawl_all_sources(data_sources, ledger, ledger_path, manifest, manifest_path, cache=None, scheduler=None,
+                            **options):
+    """
+    Crawls all sources concurrently in one session. The scheduler keeps every host within its own limits.
+    """
+    if scheduler is None:
+        scheduler = DownloadScheduler()
+    async with scheduler.create_session() as session:
+        await asyncio.gather(*[crawl_source(session, scheduler, cache, storing_dir, source, index_url, data_func,
+                                            ledger, ledger_path, manifest, manifest_path, **options)
+                               for storing_dir, source, index_url, data_func in data_sources])
 
-def main(data_directories):
+
+def main(data_directories, retry_failed=False, ledger_path=FAILED_LEDGER_PATH, cache_directory=HTTP_CACHE_DIRECTORY,
+         use_archive=False, resume=False, manifest_path=MANIFEST_PATH):
     """
     Main function to fetch data from PokéWiki and Bisafans, download their pages, and save them to files.
+    With retry_failed only the pages recorded in the failure ledger are downloaded again.
+    Pages are revalidated against the HTTP cache in cache_directory, pass None to disable it.
+    With use_archive the pages are appended to one compressed archive per source instead of single files.
+    With resume pages already stored by an interrupted run are skipped.
+    Every stored page is recorded by dex number in the manifest at manifest_path.
     """
     data_sources = [
-        (data_directories[0], get_bisafans_data),
-        (data_directories[1], get_pokewiki_data),
-        (data_directories[2], get_bulbapedia_data)
+        (data_directories[0], SOURCES[0], BISAFANS_INDEX_URL, get_bisafans_data),
+        (data_directories[1], SOURCES[1], POKEWIKI_INDEX_URL, get_pokewiki_data),
+        (data_directories[2], SOURCES[2], BULBAPEDIA_INDEX_URL, get_bulbapedia_data)
     ]
+    ledger = load_failed_ledger(ledger_path)
+    manifest = load_manifest(manifest_path)
+    cache = HttpCache(cache_directory) if cache_directory else None
 
-    for storing_dir, data_func in data_sources:
-        names, urls = data_func()
-        results = asyncio.run(download_all_sites(urls))
-
-        for index, (name, content) in enumerate(zip(names, results)):
-            if content:
-                save_to_file(name, content, index, storing_dir)
+    asyncio.run(crawl_all_sources(data_sources, ledger, ledger_path, manifest, manifest_path, cache=cache,
+                                  retry_failed=retry_failed, use_archive=use_archive, resume=resume))
 
 
 if __name__ == "__main__":
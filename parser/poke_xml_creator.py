@@ -1,163 +1,500 @@
 import os
-import xmltodict
+import json
+import hashlib
+from collections import deque
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
 import german_parser
 import english_parser
 from tqdm import tqdm
+from page_archive import PageArchive, archive_path
+from manifest import SOURCES, load_manifest, save_json, complete_entries
+from pokemon_corpus import CORPUS_PATH, PokemonCorpus, CorpusWriter
+import document_order
+import html_backend
+from html_backend import BACKENDS, DEFAULT_BACKEND
+import extractor_profiler
 
-NAMESPACE = 'http://ims.uni-stuttgart.de" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xsi:schemaLocation="http://ims.uni-stuttgart.de Pokemon.xsd'
-def add_namespace(xml_str, ns):
-    lines = xml_str.split('\n')
-    for i, line in enumerate(lines):
-        if line.strip().startswith('<Pokemon'):
-            lines[i] = line.replace('<Pokemon', f'<Pokemon xmlns="{ns}"')
-            break
-    return '\n'.join(lines)
-
-def main(data_directories, target_directory):
-    bisafans_dir = data_directories[0]
-    pokewiki_dir = data_directories[1]
-    bulbapedia_dir = data_directories[2]
-
-    os.makedirs(target_directory, exist_ok=True)
-
-    for bisa_file_name, poke_file_name, bulba_file_name in tqdm(zip(sorted(os.listdir(bisafans_dir)), 
-                                                            sorted(os.listdir(pokewiki_dir)), 
-                                                            sorted(os.listdir(bulbapedia_dir))), total=1024):
-        
-        with open(os.path.join(bisafans_dir, bisa_file_name), 'r', encoding='utf-8') as file:
-            bisafans_html = file.read()
-        with open(os.path.join(pokewiki_dir, poke_file_name), 'r', encoding='utf-8') as file:
-            pokewiki_html = file.read()
-        with open(os.path.join(bulbapedia_dir, bulba_file_name), 'r', encoding='utf-8') as file:
-            bulbapedia_html = file.read()
-
-        store_path = os.path.join(target_directory, bisa_file_name[:4] + '.xml')
-        if os.path.exists(store_path):
+# Number of Pokémon per worker that are queued in the process pool
+CHUNK_SIZE = 4
+
+# Modules whose code determines the xml output. A change in one of them invalidates the build cache.
+PARSER_MODULES = [german_parser, english_parser, document_order, html_backend]
+
+# Number of written xml files after which the build cache is saved
+BUILD_CACHE_SAVE_INTERVAL = 50
+
+NAMESPACE = 'http://ims.uni-stuttgart.de'
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+SCHEMA_LOCATION = f'{NAMESPACE} Pokemon.xsd'
+
+
+def xml_text(value):
+    """
+    Returns the text of a leaf value, with booleans written as in xsd:boolean.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def write_element(xf, name, value, depth):
+    """
+    Streams one element of the nested Pokémon dict into an etree.xmlfile, pretty printed with tabs.
+    Dicts become child elements and lists repeat the element, an empty list writes nothing.
+    """
+    if isinstance(value, list):
+        for item in value:
+            write_element(xf, name, item, depth)
+        return
+    xf.write('\n' + '\t' * depth)
+    with xf.element(f'{{{NAMESPACE}}}{name}'):
+        if isinstance(value, dict):
+            write_children(xf, value, depth + 1)
+        else:
+            xf.write(xml_text(value))
+
+
+def write_children(xf, children, depth):
+    written = False
+    for name, value in children.items():
+        if value != []:
+            written = True
+        write_element(xf, name, value, depth)
+    if written:
+        xf.write('\n' + '\t' * (depth - 1))
+
+
+def write_pokemon_document(f, data):
+    """
+    Streams the Pokémon dict as a namespaced xml document into a binary file object.
+    """
+    # xmlfile allows no text outside of the root element, so the declaration line is written directly
+    f.write(b'<?xml version="1.0" encoding="utf-8"?>\n')
+    with etree.xmlfile(f, encoding='utf-8') as xf:
+        with xf.element(f'{{{NAMESPACE}}}Pokemon', {f'{{{XSI_NAMESPACE}}}schemaLocation': SCHEMA_LOCATION},
+                        nsmap={None: NAMESPACE, 'xsi': XSI_NAMESPACE}):
+            write_children(xf, data['Pokemon'], 1)
+
+
+def write_pokemon_xml(data, store_path):
+    """
+    Writes the xml file of a Pokémon dict.
+    The file is written under a temporary name and renamed, so an interrupted run leaves no partial xml file.
+    """
+    tmp_path = store_path + '.part'
+    with open(tmp_path, 'wb') as f:
+        write_pokemon_document(f, data)
+    os.replace(tmp_path, store_path)
+
+
+def list_html_files(directory):
+    """
+    Returns the sorted html files of a directory, ignoring partially written downloads.
+    """
+    return sorted(file_name for file_name in os.listdir(directory) if file_name.endswith('.html'))
+
+
+def html_files_by_dex(directory):
+    """
+    Returns the html files of a directory keyed by the dex number of their 4-digit prefix.
+    """
+    return {int(file_name[:4]): file_name for file_name in list_html_files(directory) if file_name[:4].isdigit()}
+
+
+def iter_file_pages(data_directories, dex_numbers=None):
+    """
+    Yields the dex key, German name and the three html pages of every Pokémon from the html files.
+    The pages are joined on the dex prefix of their file names, Pokémon missing in one of the directories are skipped.
+    dex_numbers restricts the result to the given Pokémon.
+    """
+    bisafans_files, pokewiki_files, bulbapedia_files = [html_files_by_dex(directory) for directory in data_directories]
+
+    for dex in sorted(set(bisafans_files) | set(pokewiki_files) | set(bulbapedia_files)):
+        if dex_numbers and dex not in dex_numbers:
+            continue
+        file_names = [files.get(dex) for files in (bisafans_files, pokewiki_files, bulbapedia_files)]
+        if None in file_names:
+            print(f"Skipping {dex}, page missing in one of the directories")
             continue
-        #if '0772_Type' == bulba_file_name:
-        #   continue
-        
-        german_data = german_parser.main(bisafans_html, pokewiki_html)
-        english_data = english_parser.main(bulbapedia_html)
 
+        pages = []
+        for directory, file_name in zip(data_directories, file_names):
+            with open(os.path.join(directory, file_name), 'r', encoding='utf-8') as file:
+                pages.append(file.read())
 
-        # Example dictionary
-        abilities_list_eng = [{'Name': ability, "Hidden": False} for ability in english_data['abilities'][0]]
-        if len(english_data['abilities']) > 1:
-            abilities_list_eng.append({'Name': english_data['abilities'][1], "Hidden": True})
+        bisa_file_name = file_names[0]
+        yield bisa_file_name[:4], bisa_file_name[bisa_file_name.find('_')+1:-5], *pages
 
-        # Example dictionary
-        abilities_list_ger = [{'Name': ability, "Hidden": False} for ability in german_data['abilities'][0]]
-        abilities_list_ger.append({'Name': german_data['abilities'][1], "Hidden": True})
 
+def iter_archive_pages(data_directories, dex_numbers=None):
+    """
+    Yields the dex key, German name and the three html pages of every Pokémon from the page archives.
+    Pokémon missing in one of the archives are skipped. dex_numbers restricts the result to the given Pokémon.
+    """
+    bisafans, pokewiki, bulbapedia = [PageArchive(archive_path(directory)) for directory in data_directories]
+    with bisafans, pokewiki, bulbapedia:
+        for dex in bisafans.dex_numbers():
+            if dex_numbers and dex not in dex_numbers:
+                continue
+            if dex not in pokewiki or dex not in bulbapedia:
+                print(f"Skipping {dex}, page missing in one of the archives")
+                continue
+            yield str(dex + 10000)[-4:], bisafans.name(dex), bisafans.read(dex), pokewiki.read(dex), bulbapedia.read(dex)
 
-        data = {
-            "Pokemon": {
-            "Name": {
-                'English': english_data['name'],
-                'German': bisa_file_name[bisa_file_name.find('_')+1:-5]
-            },
-            "ID": int(f'1{english_data['dex_number']}') - 10000,
-            "Types": {
-                'EnglishType': {'Type': english_data['type']},
-                'GermanType': {'Type': german_data['type']},
-            },
-            "EnglishData": {
-                "Category": english_data['category'],
-                "EvolutionLine": {'Name': [name for name in english_data['evolution_line']]},
-                "Forms": {"Name": [name for name in english_data['forms']]},
-                "Introduction": english_data['introduction'],
-                "Biology": {'P': [biology for biology in english_data['biology']]},
-                "Trivias": {'Trivia': [trivia for trivia in english_data['trivias']]},
-                "Game": {
-                    "Abilities": {
-                        "Ability": abilities_list_eng,
-                        },
-                    "Stats": english_data['stats'],
-                    "Physique": {
-                        "Height": english_data["physique"][0],
-                        "Weight": english_data["physique"][1],
-                    },
-                    "GenderRatio": english_data["gender"],
-                    "LearnableAttacks": {
-                        "LevelUp": {
-                            "Attack": [{'Level': attack[0], 
-                                        'MoveName': attack[1],  
-                                        'Type': attack[2],  
-                                        'Category': attack[3],  
-                                        'Power': attack[4], 
-                                        'Accuracy': attack[5],  
-                                        'PP': attack[6]} for attack in english_data['learnset'][0]]
-                                        },
-                        'TechnicalMachine': {
-                            "Attack": [{'Level': attack[0], 
-                                        'MoveName': attack[1],  
-                                        'Type': attack[2],  
-                                        'Category': attack[3],  
-                                        'Power': attack[4], 
-                                        'Accuracy': attack[5],  
-                                        'PP': attack[6]} for attack in english_data['learnset'][1]]
-                                        },     
+
+def iter_manifest_pages(manifest, dex_numbers=None):
+    """
+    Yields the dex key, German name and the three html pages of every Pokémon listed in the download manifest.
+    Pokémon without a page of every source are skipped.
+    """
+    archives = {}
+
+    def read_page(dex, page):
+        if page['archived']:
+            if page['path'] not in archives:
+                archives[page['path']] = PageArchive(page['path'])
+            return archives[page['path']].read(dex)
+        with open(page['path'], 'r', encoding='utf-8') as file:
+            return file.read()
+
+    try:
+        for key, entry in complete_entries(manifest, dex_numbers):
+            htmls = [read_page(int(key), entry[source]) for source in SOURCES]
+            yield key, entry[SOURCES[0]]['name'], *htmls
+    finally:
+        for archive in archives.values():
+            archive.close()
+
+
+def parser_version():
+    """
+    Returns a hash over the source code of the parser modules and of this module.
+    """
+    digest = hashlib.sha256()
+    for module_file in [module.__file__ for module in PARSER_MODULES] + [__file__]:
+        with open(module_file, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_key(version, bisafans_html, pokewiki_html, bulbapedia_html):
+    """
+    Returns the build cache key of a Pokémon from the parser version and its three input pages.
+    """
+    digest = hashlib.sha256(version.encode('utf-8'))
+    for html in (bisafans_html, pokewiki_html, bulbapedia_html):
+        digest.update(hashlib.sha256(html.encode('utf-8')).digest())
+    return digest.hexdigest()
+
+
+def build_cache_path(target_directory):
+    """
+    Returns the path of the build cache, which is kept next to and not inside the xml directory.
+    """
+    return os.path.normpath(target_directory) + '.buildcache.json'
+
+
+def load_build_cache(cache_path):
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_build_cache(cache, cache_path):
+    save_json(cache, cache_path, indent=1, sort_keys=True)
+
+
+def create_pokemon_data(german_name, german_data, english_data):
+    """
+    Combines the parsed German and English data of a Pokémon into the nested dict of its xml document.
+    """
+    # Example dictionary
+    abilities_list_eng = [{'Name': ability, "Hidden": False} for ability in english_data['abilities'][0]]
+    if len(english_data['abilities']) > 1:
+        abilities_list_eng.append({'Name': english_data['abilities'][1], "Hidden": True})
+
+    # Example dictionary
+    abilities_list_ger = [{'Name': ability, "Hidden": False} for ability in german_data['abilities'][0]]
+    abilities_list_ger.append({'Name': german_data['abilities'][1], "Hidden": True})
+
+
+    data = {
+        "Pokemon": {
+        "Name": {
+            'English': english_data['name'],
+            'German': german_name
+        },
+        "ID": int(f'1{english_data['dex_number']}') - 10000,
+        "Types": {
+            'EnglishType': {'Type': english_data['type']},
+            'GermanType': {'Type': german_data['type']},
+        },
+        "EnglishData": {
+            "Category": english_data['category'],
+            "EvolutionLine": {'Name': [name for name in english_data['evolution_line']]},
+            "Forms": {"Name": [name for name in english_data['forms']]},
+            "Introduction": english_data['introduction'],
+            "Biology": {'P': [biology for biology in english_data['biology']]},
+            "Trivias": {'Trivia': [trivia for trivia in english_data['trivias']]},
+            "Game": {
+                "Abilities": {
+                    "Ability": abilities_list_eng,
                     },
+                "Stats": english_data['stats'],
+                "Physique": {
+                    "Height": english_data["physique"][0],
+                    "Weight": english_data["physique"][1],
                 },
-                "Anime": {
-                    "Appearance": [{'Title': appearance,
-                                    'Summary': english_data['major_appearances'][appearance]
-                    } for appearance in english_data['major_appearances']],
+                "GenderRatio": english_data["gender"],
+                "LearnableAttacks": {
+                    "LevelUp": {
+                        "Attack": [{'Level': attack[0], 
+                                    'MoveName': attack[1],  
+                                    'Type': attack[2],  
+                                    'Category': attack[3],  
+                                    'Power': attack[4], 
+                                    'Accuracy': attack[5],  
+                                    'PP': attack[6]} for attack in english_data['learnset'][0]]
+                                    },
+                    'TechnicalMachine': {
+                        "Attack": [{'Level': attack[0], 
+                                    'MoveName': attack[1],  
+                                    'Type': attack[2],  
+                                    'Category': attack[3],  
+                                    'Power': attack[4], 
+                                    'Accuracy': attack[5],  
+                                    'PP': attack[6]} for attack in english_data['learnset'][1]]
+                                    },     
                 },
             },
-            'GermanData': {
-                "Category": german_data['category'] + ' Pokémon',
-                "EvolutionLine": {'Name': [name for name in german_data['evolutions']]},
-                "Forms": {"Name": [name for name in german_data['forms']]},
-                "Introduction": german_data['intro'],
-                "Biology": {"P":[biology.replace('\n', ' ') for biology in german_data['biologies']]},
-                "Trivias": {'Trivia': [trivia for trivia in german_data['trivias']]},
-                "Game": {
-                    "Abilities": {
-                        "Ability": abilities_list_ger,
-                        },
-                    "Stats": german_data['stats'],
-                    "Physique": {
-                        "Height": german_data["physique"][0],
-                        "Weight": german_data["physique"][1],
-                    },
-                    "GenderRatio": english_data["gender"],
-                    "LearnableAttacks": {
-                        "LevelUp": {
-                            "Attack": [{'Level': attack[0], 
-                                        'MoveName': attack[1],  
-                                        'Type': attack[2],  
-                                        'Category': attack[3],  
-                                        'Power': attack[4], 
-                                        'Accuracy': attack[5],  
-                                        'PP': attack[6]} for attack in german_data['attacks']['levelup']]
-                                        },
-                        'TechnicalMachine': {
-                            "Attack": [{'Level': attack[0], 
-                                        'MoveName': attack[1],  
-                                        'Type': attack[2],  
-                                        'Category': attack[3],  
-                                        'Power': attack[4], 
-                                        'Accuracy': attack[5],  
-                                        'PP': attack[6]} for attack in german_data['attacks']['tm']]
-                                        },     
+            "Anime": {
+                "Appearance": [{'Title': appearance,
+                                'Summary': english_data['major_appearances'][appearance]
+                } for appearance in english_data['major_appearances']],
+            },
+        },
+        'GermanData': {
+            "Category": german_data['category'] + ' Pokémon',
+            "EvolutionLine": {'Name': [name for name in german_data['evolutions']]},
+            "Forms": {"Name": [name for name in german_data['forms']]},
+            "Introduction": german_data['intro'],
+            "Biology": {"P":[biology.replace('\n', ' ') for biology in german_data['biologies']]},
+            "Trivias": {'Trivia': [trivia for trivia in german_data['trivias']]},
+            "Game": {
+                "Abilities": {
+                    "Ability": abilities_list_ger,
                     },
+                "Stats": german_data['stats'],
+                "Physique": {
+                    "Height": german_data["physique"][0],
+                    "Weight": german_data["physique"][1],
                 },
-                "Anime": {
-                    "Appearances": {
-                        "Series": {'Episode': [episode for episode in german_data['appearances']['Serie']]},
-                        "Films": {'Movie': [movie for movie in german_data['appearances']['Filme und Spezialfilme']]}
-                    },
+                "GenderRatio": english_data["gender"],
+                "LearnableAttacks": {
+                    "LevelUp": {
+                        "Attack": [{'Level': attack[0], 
+                                    'MoveName': attack[1],  
+                                    'Type': attack[2],  
+                                    'Category': attack[3],  
+                                    'Power': attack[4], 
+                                    'Accuracy': attack[5],  
+                                    'PP': attack[6]} for attack in german_data['attacks']['levelup']]
+                                    },
+                    'TechnicalMachine': {
+                        "Attack": [{'Level': attack[0], 
+                                    'MoveName': attack[1],  
+                                    'Type': attack[2],  
+                                    'Category': attack[3],  
+                                    'Power': attack[4], 
+                                    'Accuracy': attack[5],  
+                                    'PP': attack[6]} for attack in german_data['attacks']['tm']]
+                                    },     
                 },
             },
+            "Anime": {
+                "Appearances": {
+                    "Series": {'Episode': [episode for episode in german_data['appearances']['Serie']]},
+                    "Films": {'Movie': [movie for movie in german_data['appearances']['Filme und Spezialfilme']]}
+                },
             },
-        }
+        },
+        },
+    }
+    return data
+
+
+def build_pokemon(page, backend=DEFAULT_BACKEND, partial_parse=False):
+    """
+    Parses the three pages of one Pokémon and returns its dict.
+    The xml file is written if the page has a store path.
+    """
+    dex_key, german_name, bisafans_html, pokewiki_html, bulbapedia_html, store_path = page
+
+    german_data = german_parser.main(bisafans_html, pokewiki_html, backend, partial_parse)
+    english_data = english_parser.main(bulbapedia_html, backend)
+    data = create_pokemon_data(german_name, german_data, english_data)
+
+    if store_path is not None:
+        write_pokemon_xml(data, store_path)
+    return data
+
+
+def process_pokemon(page, backend=DEFAULT_BACKEND, partial_parse=False, profile=False):
+    """
+    Builds the xml file of one Pokémon. Runs in the worker processes.
+    Returns the dex key, the Pokémon dict for pages without a store path, which go into the corpus,
+    and with profile the extractor record of the page and the error that stopped its parsing,
+    so a profiling run reports failing extractors instead of aborting.
+    """
+    # Only corpus records are sent back, the xml files are written by the worker
+    keep_data = page[-1] is None
+    if not profile:
+        data = build_pokemon(page, backend, partial_parse)
+        return page[0], data if keep_data else None, None, None
+
+    extractor_profiler.instrument([german_parser, english_parser])
+    with extractor_profiler.profile_page() as record:
+        try:
+            data = build_pokemon(page, backend, partial_parse)
+        except Exception as e:
+            return page[0], None, record, repr(e)
+    return page[0], data if keep_data else None, record, None
+
+
+def process_parallel(pages, workers, chunk_size=CHUNK_SIZE, backend=DEFAULT_BACKEND, partial_parse=False,
+                     profile=False):
+    """
+    Processes the pages in a process pool and yields the results of process_pokemon in input order.
+    At most workers * chunk_size Pokémon are in flight, so not all pages are held in memory.
+    """
+    window = workers * chunk_size
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for page in pages:
+            pending.append(executor.submit(process_pokemon, page, backend, partial_parse, profile))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main(data_directories, target_directory, use_archive=False, manifest_path=None, dex_numbers=None, workers=1,
+         backend=DEFAULT_BACKEND, partial_parse=False, profile=False, corpus_path=None):
+    """
+    Parses the downloaded pages of every Pokémon and writes one xml file per Pokémon.
+    With a corpus_path all Pokémon are written into a single compressed JSON Lines corpus instead,
+    see pokemon_corpus.PokemonCorpus. Pokémon of an existing corpus that are not rebuilt are carried over.
+    With a manifest_path the pages are joined by dex number from the download manifest.
+    dex_numbers regenerates only the given Pokémon, overwriting their existing xml files.
+    With workers > 1 the Pokémon are parsed in a process pool.
+    backend selects the html tree builder of the parsers, see html_backend.BACKENDS.
+    With partial_parse only the parts of the Bisafans pages read by the German parser are built.
+    With profile every extractor is timed per Pokémon and a report is printed at the end.
+    A Pokémon is only regenerated if its input pages or the parser code changed since its xml file was written.
+    """
+    if corpus_path:
+        cache_path = build_cache_path(corpus_path)
+        old_corpus = PokemonCorpus(corpus_path)
+        writer = CorpusWriter(corpus_path)
+    else:
+        os.makedirs(target_directory, exist_ok=True)
+        cache_path = build_cache_path(target_directory)
+        writer = None
+    build_cache = load_build_cache(cache_path)
+    # The parse options are part of the version, as they may change the output
+    version = parser_version() + backend + ('-partial' if partial_parse else '')
+    pending_keys = {}
+    report = extractor_profiler.ProfileReport()
+
+    if manifest_path:
+        pages = iter_manifest_pages(load_manifest(manifest_path), dex_numbers)
+    elif use_archive:
+        pages = iter_archive_pages(data_directories, dex_numbers)
+    else:
+        pages = iter_file_pages(data_directories, dex_numbers)
+    total = len(dex_numbers) if dex_numbers else 1024
+
+    def pending_pages():
+        for dex_key, german_name, bisafans_html, pokewiki_html, bulbapedia_html in pages:
+            key = build_key(version, bisafans_html, pokewiki_html, bulbapedia_html)
+            unchanged = build_cache.get(dex_key) == key and not dex_numbers
+            if writer is not None:
+                store_path = None
+                if unchanged and int(dex_key) in old_corpus:
+                    writer.append_raw(int(dex_key), old_corpus.name(int(dex_key)), old_corpus.read_raw(int(dex_key)))
+                    progress.update()
+                    continue
+            else:
+                store_path = os.path.join(target_directory, dex_key + '.xml')
+                if unchanged and os.path.exists(store_path):
+                    progress.update()
+                    continue
+            pending_keys[dex_key] = key
+            #if '0772_Type' == bulba_file_name:
+            #   continue
+            yield dex_key, german_name, bisafans_html, pokewiki_html, bulbapedia_html, store_path
+
+    with tqdm(total=total) as progress:
+        if workers > 1:
+            results = process_parallel(pending_pages(), workers, backend=backend, partial_parse=partial_parse,
+                                       profile=profile)
+        else:
+            results = map(partial(process_pokemon, backend=backend, partial_parse=partial_parse, profile=profile), pending_pages())
+        try:
+            for written, (dex_key, data, record, error) in enumerate(results, 1):
+                report.add_page(dex_key, record)
+                if error:
+                    print(f"Failed to parse {dex_key}: {error}")
+                    pending_keys.pop(dex_key)
+                    progress.update()
+                    continue
+                if writer is not None:
+                    writer.append(int(dex_key), data['Pokemon']['Name']['English'], data['Pokemon'])
+                build_cache[dex_key] = pending_keys.pop(dex_key)
+                if writer is None and written % BUILD_CACHE_SAVE_INTERVAL == 0:
+                    save_build_cache(build_cache, cache_path)
+                progress.update()
+        finally:
+            # The cache of a corpus is only saved once the new corpus is in place
+            if writer is None:
+                save_build_cache(build_cache, cache_path)
+
+    if writer is not None:
+        with old_corpus:
+            for dex in old_corpus.dex_numbers():
+                if dex not in writer:
+                    writer.append_raw(dex, old_corpus.name(dex), old_corpus.read_raw(dex))
+            writer.close()
+        save_build_cache(build_cache, cache_path)
+
+    if profile:
+        report.print_report()
+
 
+if __name__ == "__main__":
+    import argparse
 
-        # Convert dictionary to XML
-        xml_str = xmltodict.unparse(data, pretty=True)
-        xml_str = add_namespace(xml_str, NAMESPACE)
+    argument_parser = argparse.ArgumentParser(description='Parse the downloaded Pokémon pages into xml files.')
+    argument_parser.add_argument('--data', nargs=3, default=['../data/bisafans_data', '../data/pokewiki_data', '../data/bulbapedia_data'],
+                                 metavar=('BISAFANS', 'POKEWIKI', 'BULBAPEDIA'))
+    argument_parser.add_argument('--target', default='../data/parsed_data')
+    argument_parser.add_argument('--archive', action='store_true', help='read the pages from the page archives')
+    argument_parser.add_argument('--manifest', help='join the pages through the download manifest')
+    argument_parser.add_argument('--dex', nargs='*', type=int, help='only regenerate these dex numbers')
+    argument_parser.add_argument('--workers', type=int, default=1, help='number of parser processes')
+    argument_parser.add_argument('--backend', choices=BACKENDS, default=DEFAULT_BACKEND, help='html tree builder')
+    argument_parser.add_argument('--partial-parse', action='store_true',
+                                 help='only build the parts of the Bisafans pages that are read')
+    argument_parser.add_argument('--profile', action='store_true', help='time every extractor and print a report')
+    argument_parser.add_argument('--corpus', nargs='?', const=CORPUS_PATH,
+                                 help='write one compressed JSON Lines corpus instead of the xml files')
+    args = argument_parser.parse_args()
 
-        with open(store_path, 'w', encoding='utf-8') as writer:
-            writer.write(xml_str)
\ No newline at end of file
+    main(args.data, args.target, use_archive=args.archive, manifest_path=args.manifest, dex_numbers=args.dex,
+         workers=args.workers, backend=args.backend, partial_parse=args.partial_parse,
+         profile=args.profile, corpus_path=args.corpus)
@@ -1,6 +1,25 @@
 import os
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
 from lxml import etree
 
+# Schema and parser of a worker process, compiled once by init_worker
+_schema = None
+_xml_parser = None
+
+
+def load_schema(xsd_file):
+    """
+    Compiles an XSD schema file.
+
+    :param xsd_file: Path to the XSD schema file
+    :return: The compiled etree.XMLSchema
+    """
+    with open(xsd_file, 'rb') as f:
+        schema_root = etree.XML(f.read())
+    return etree.XMLSchema(schema_root)
+
+
 def validate_xml(xml_file, xsd_file):
     """
     Validate an XML file against an XSD schema.
@@ -9,9 +28,7 @@ def validate_xml(xml_file, xsd_file):
     :param xsd_file: Path to the XSD schema file
     :return: True if XML is valid, False otherwise
     """
-    with open(xsd_file, 'rb') as f:
-        schema_root = etree.XML(f.read())
-    schema = etree.XMLSchema(schema_root)
+    schema = load_schema(xsd_file)
 
     xml_parser = etree.XMLParser(schema=schema)
 
@@ -24,32 +41,107 @@ def validate_xml(xml_file, xsd_file):
         return False
 
 
-def validate_directory(directory, xsd_file):
+def validate_file(xml_file, schema, xml_parser=None):
+    """
+    Validate an XML file against an already compiled schema.
+
+    :param xml_file: Path to the XML file
+    :param schema: Compiled etree.XMLSchema
+    :param xml_parser: Optional etree.XMLParser to reuse for parsing
+    :return: List of errors as dicts with file, line and error, empty if the file is valid
+    """
+    try:
+        document = etree.parse(xml_file, xml_parser)
+    except etree.XMLSyntaxError as e:
+        return [{'file': xml_file, 'line': e.lineno, 'error': e.msg}]
+
+    if schema.validate(document):
+        return []
+    return [{'file': xml_file, 'line': error.line, 'error': error.message} for error in schema.error_log]
+
+
+def init_worker(xsd_file):
+    """
+    Compiles the schema and creates the parser once per worker process.
+    """
+    global _schema, _xml_parser
+    _schema = load_schema(xsd_file)
+    _xml_parser = etree.XMLParser()
+
+
+def validate_file_in_worker(xml_file):
+    return validate_file(xml_file, _schema, _xml_parser)
+
+
+def validate_directory(directory, xsd_file, workers=1):
     """
     Validate all XML files in a directory against an XSD schema.
+    The schema is compiled only once (per worker process with workers > 1).
 
     :param directory: Path to the directory containing XML files
     :param xsd_file: Path to the XSD schema file
+    :param workers: Number of processes validating the files
+    :return: Report as a list of errors with file, line and error
     """
-    valid_files = []
-    invalid_files = []
+    xml_files = [os.path.join(directory, xml_filename) for xml_filename in sorted(os.listdir(directory))
+                 if xml_filename.endswith('.xml')]
+
+    if workers > 1:
+        chunk_size = max(1, len(xml_files) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(xsd_file,)) as executor:
+            results = list(executor.map(validate_file_in_worker, xml_files, chunksize=chunk_size))
+    else:
+        schema = load_schema(xsd_file)
+        xml_parser = etree.XMLParser()
+        results = [validate_file(xml_file, schema, xml_parser) for xml_file in xml_files]
 
-    for xml_filename in os.listdir(directory):
-        xml_file = os.path.join(directory, xml_filename)
-       
-        if validate_xml(xml_file, xsd_file):
-            valid_files.append(xml_file)
-        else:
-            invalid_files.append(xml_file)
+    report = [error for errors in results for error in errors]
+    invalid_files = sorted({error['file'] for error in report})
     if len(invalid_files):
+        for error in report:
+            print(f"{error['file']}:{error['line']}: {error['error']}")
         print(f"Invalid XML files: {invalid_files}")
     else:
         print("All xml files passed the validation test!")
+    return report
+
+
+def validate_corpus(corpus_path, xsd_file):
+    """
+    Validate every Pokémon of a JSON Lines corpus against an XSD schema.
+    The records are read sequentially and serialized to xml in memory, as poke_xml_creator writes the xml files.
+
+    :param corpus_path: Path to the corpus written by poke_xml_creator
+    :param xsd_file: Path to the XSD schema file
+    :return: Report as a list of errors with file, line and error, the file being '<corpus>#<ID>'
+    """
+    from poke_xml_creator import write_pokemon_document
+    from pokemon_corpus import PokemonCorpus
+
+    schema = load_schema(xsd_file)
+    xml_parser = etree.XMLParser()
+    report = []
+    for record in PokemonCorpus(corpus_path):
+        document = BytesIO()
+        write_pokemon_document(document, {'Pokemon': record})
+        document.seek(0)
+        errors = validate_file(document, schema, xml_parser)
+        for error in errors:
+            error['file'] = f"{corpus_path}#{record['ID']}"
+        report.extend(errors)
+
+    if report:
+        for error in report:
+            print(f"{error['file']}:{error['line']}: {error['error']}")
+        print(f"Invalid Pokémon: {sorted({error['file'] for error in report})}")
+    else:
+        print("All Pokémon of the corpus passed the validation test!")
+    return report
 
 
-def main(xml_directory, xsd_schema_file):
+def main(xml_directory, xsd_schema_file, workers=1):
     # Define the directory containing XML files and the path to the XSD schema file
     #xml_directory = "/path/to/xml/files"
     #xsd_schema_file = "/path/to/schema.xsd"
 
-    validate_directory(xml_directory, xsd_schema_file)
+    return validate_directory(xml_directory, xsd_schema_file, workers)
@@ -0,0 +1,93 @@
+import os
+import json
+import gzip
+from page_archive import IndexedRecords
+
+CORPUS_PATH = '../data/pokemon_corpus.jsonl.gz'
+
+
+def encode_record(record):
+    """
+    Compresses one Pokémon record as a gzip member holding a single JSON line.
+    """
+    return gzip.compress((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+class CorpusWriter:
+    """
+    Writes a corpus to '<path>.part' and its index to '<path>.idx.part', both are moved into place by close,
+    so readers never see a half written corpus.
+    Records may be appended in any order, close writes them sorted by dex number.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.entries = {}
+        self._writer = open(path + '.part', 'wb')
+
+    def append(self, dex, name, record):
+        self.append_raw(dex, name, encode_record(record))
+
+    def append_raw(self, dex, name, payload):
+        """
+        Appends an already compressed record, e.g. one copied unchanged from an earlier corpus.
+        """
+        offset = self._writer.tell()
+        self._writer.write(payload)
+        self.entries[dex] = {'dex': dex, 'name': name, 'offset': offset, 'length': len(payload)}
+
+    def __contains__(self, dex):
+        return dex in self.entries
+
+    def close(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        # Rebuilt and copied records arrive interleaved, so they are copied once more in dex order
+        entries = {}
+        with open(self.path + '.part', 'rb') as unsorted, open(self.path + '.sorted.part', 'wb') as f:
+            for dex in sorted(self.entries):
+                entry = self.entries[dex]
+                unsorted.seek(entry['offset'])
+                entries[dex] = dict(entry, offset=f.tell())
+                f.write(unsorted.read(entry['length']))
+        os.remove(self.path + '.part')
+        self.entries = entries
+        with open(self.index_path + '.part', 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(self.path + '.sorted.part', self.path)
+        os.replace(self.index_path + '.part', self.index_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class PokemonCorpus(IndexedRecords):
+    """
+    The whole parsed dataset in one file: a JSON Lines stream where every line is its own gzip member.
+
+    The concatenated members are a valid gzip file, so the corpus can be read sequentially with a single
+    gzip.open. The offsets of the records are kept in a '<corpus>.idx' JSON lines file for random access
+    by dex number, which only decompresses the requested record.
+    """
+    def __init__(self, path=CORPUS_PATH):
+        super().__init__(path)
+
+    def __iter__(self):
+        """
+        Yields all records in ascending dex order.
+        """
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def read(self, dex):
+        """
+        Returns the record of a dex number.
+        """
+        return json.loads(gzip.decompress(self.read_raw(dex)).decode('utf-8'))
@@ -0,0 +1,44 @@
+import os
+import english_parser
+import german_parser
+from html_backend import BACKENDS, compare_backends
+from parser_benchmark import FIXTURE_DIRECTORY, FIXTURE_POKEMON, load_fixtures
+
+# The frozen pages of parser_benchmark, resolved from this file so the checks run from any directory
+FIXTURES = load_fixtures(os.path.join(os.path.dirname(os.path.abspath(__file__)), FIXTURE_DIRECTORY))
+
+
+def test_fixtures_complete():
+    assert sorted(FIXTURES) == sorted(FIXTURE_POKEMON)
+
+
+def test_backends_agree_english():
+    """
+    Every html backend yields the same english_parser result on the fixture pages.
+    """
+    pages = [(pages['bulbapedia'],) for pages in FIXTURES.values()]
+    assert compare_backends(english_parser.main, pages) == []
+
+
+def test_backends_agree_german():
+    """
+    Every html backend yields the same german_parser result on the fixture pages.
+    """
+    pages = [(pages['bisafans'], pages['pokewiki']) for pages in FIXTURES.values()]
+    assert compare_backends(german_parser.main, pages) == []
+
+
+def test_partial_parse_matches_full_parse():
+    """
+    The extractors return the same values on the Bisafans pages built with BisafansStrainer as on the full pages.
+    """
+    for backend in BACKENDS:
+        for dex, pages in FIXTURES.items():
+            assert german_parser.compare_partial_parse(pages['bisafans'], pages['pokewiki'], backend) == {}, (backend, dex)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name} passed")
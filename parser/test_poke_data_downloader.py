@@ -0,0 +1,130 @@
+import time
+import asyncio
+import tempfile
+from aiohttp import web
+from http_cache import HttpCache
+from poke_data_downloader import DownloadScheduler, fetch
+
+
+def serve(handler, client):
+    """
+    Starts a local aiohttp server answering every GET with handler and returns the result of
+    client(session, scheduler, base_url).
+    """
+    async def run():
+        app = web.Application()
+        app.router.add_get('/{page}', handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        host, port = runner.addresses[0][:2]
+        scheduler = DownloadScheduler()
+        try:
+            async with scheduler.create_session() as session:
+                return await client(session, scheduler, f'http://{host}:{port}')
+        finally:
+            await runner.cleanup()
+    return asyncio.run(run())
+
+
+def etag_server(requests, statuses):
+    """
+    Returns a handler that answers with ETag "v1" and a 304 to a matching If-None-Match.
+    The request headers and response statuses are recorded in the given lists.
+    """
+    async def handler(request):
+        requests.append(dict(request.headers))
+        if request.headers.get('If-None-Match') == '"v1"':
+            statuses.append(304)
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        statuses.append(200)
+        return web.Response(text='page from server', content_type='text/html', headers={'ETag': '"v1"'})
+    return handler
+
+
+def test_not_modified_served_from_cache():
+    """
+    The ETag of a response becomes the If-None-Match of the next request and a 304 returns the cached page.
+    """
+    requests, statuses = [], []
+
+    async def client(session, scheduler, base_url):
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = HttpCache(cache_directory)
+            first = await fetch(session, base_url + '/page', scheduler, cache=cache)
+            second = await fetch(session, base_url + '/page', scheduler, cache=cache)
+            return first, second
+
+    first, second = serve(etag_server(requests, statuses), client)
+    assert first == second == 'page from server'
+    assert 'If-None-Match' not in requests[0]
+    assert requests[1]['If-None-Match'] == '"v1"'
+    assert statuses == [200, 304]
+
+
+def test_not_modified_served_from_archive():
+    """
+    In archive mode the cache keeps no body and a 304 is answered through load_stored.
+    """
+    requests, statuses = [], []
+
+    async def client(session, scheduler, base_url):
+        url = base_url + '/page'
+        with tempfile.TemporaryDirectory() as cache_directory:
+            cache = HttpCache(cache_directory)
+            await fetch(session, url, scheduler, cache=cache, store_body=False)
+            has_body = cache.has_body(url)
+            content = await fetch(session, url, scheduler, cache=cache, load_stored=lambda: 'page from archive',
+                                  store_body=False)
+            return has_body, content
+
+    has_body, content = serve(etag_server(requests, statuses), client)
+    assert not has_body
+    assert content == 'page from archive'
+    assert requests[1]['If-None-Match'] == '"v1"'
+    assert statuses == [200, 304]
+
+
+def test_unavailable_retried_after_retry_after():
+    """
+    A 503 is retried no earlier than its Retry-After.
+    """
+    statuses = []
+
+    async def handler(request):
+        if not statuses:
+            statuses.append(503)
+            return web.Response(status=503, headers={'Retry-After': '1'})
+        statuses.append(200)
+        return web.Response(text='page from server', content_type='text/html')
+
+    async def client(session, scheduler, base_url):
+        start = time.monotonic()
+        content = await fetch(session, base_url + '/page', scheduler)
+        return content, time.monotonic() - start
+
+    content, seconds = serve(handler, client)
+    assert content == 'page from server'
+    assert statuses == [503, 200]
+    assert seconds >= 1
+
+
+def test_not_found_not_retried():
+    statuses = []
+
+    async def handler(request):
+        statuses.append(404)
+        return web.Response(status=404)
+
+    async def client(session, scheduler, base_url):
+        return await fetch(session, base_url + '/page', scheduler)
+
+    assert serve(handler, client) is None
+    assert statuses == [404]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name} passed")